@@ -2,6 +2,14 @@ import pytest
 
 # Импортируем модель заметки, чтобы создать экземпляр.
 from notes.models import Note
+from notes.testing import isolated_caches
+
+
+@pytest.fixture(autouse=True, scope='session')
+def isolated_cache():
+    # Свой временный кеш, а не общий с сервером разработки.
+    with isolated_caches():
+        yield
 
 
 @pytest.fixture
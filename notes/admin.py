@@ -1,5 +1,137 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.db import IntegrityError, transaction
 
+from .bulk import restore_notes
 from .models import Note
+from .pagination import EstimatedCountPaginator
 
-admin.site.register(Note)
+# Параметр changelist, по которому листаются страницы: id меньше
+# последнего показанного. Админка сама применяет его как фильтр.
+CURSOR_VAR = 'id__lt'
+# Верхняя граница диапазона для поиска заголовков по началу.
+PREFIX_END = chr(0x10FFFF)
+
+
+class KeysetChangeList(ChangeList):
+    """Changelist, который листается по курсору, а не по номеру страницы.
+
+    Страница - всегда первая страница выборки id < курсора, поэтому
+    дальние страницы открываются так же быстро, как первая.
+    """
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.result_list = list(self.result_list)
+        self.cursor = self.params.get(CURSOR_VAR)
+        self.first_url = self.get_query_string(remove=[CURSOR_VAR, PAGE_VAR])
+        self.next_url = None
+        if len(self.result_list) >= self.list_per_page:
+            self.next_url = self.get_query_string(
+                {CURSOR_VAR: self.result_list[-1].pk}, [PAGE_VAR]
+            )
+
+
+class DeletedFilter(admin.SimpleListFilter):
+    """Неудалённые заметки по умолчанию, удалённые или все по выбору."""
+    title = 'удалена'
+    parameter_name = 'deleted'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Да'), ('all', 'Все'))
+
+    def choices(self, changelist):
+        # Без параметра показываются неудалённые, а не все заметки.
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(
+                remove=[self.parameter_name]
+            ),
+            'display': 'Нет',
+        }
+        for lookup, title in self.lookup_choices:
+            yield {
+                'selected': self.value() == lookup,
+                'query_string': changelist.get_query_string(
+                    {self.parameter_name: lookup}
+                ),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(deleted_at__isnull=False)
+        if self.value() == 'all':
+            return queryset
+        return queryset.filter(deleted_at__isnull=True)
+
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    """Заметки в админке, рассчитанной на таблицу в миллионы строк.
+
+    Число записей оценивается (см. notes.pagination.estimated_count),
+    автор подгружается тем же запросом, а поиск и листание идут
+    по индексам. Удалённые заметки видны через фильтр "удалена"
+    и восстанавливаются действием "Восстановить".
+    """
+    list_display = (
+        'id', 'title', 'slug', 'author', 'updated_at', 'deleted_at',
+    )
+    list_filter = (DeletedFilter,)
+    actions = ('restore',)
+    list_select_related = ('author',)
+    raw_id_fields = ('author',)
+    search_fields = ('slug', 'title')
+    ordering = ('-id',)
+    # Сортировка по столбцам сломала бы листание по id.
+    sortable_by = ()
+    list_per_page = 100
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """Все заметки, включая удалённые: список сужает DeletedFilter."""
+        queryset = Note.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    @admin.action(description='Восстановить выбранные заметки')
+    def restore(self, request, queryset):
+        notes = list(queryset.filter(deleted_at__isnull=False))
+        try:
+            with transaction.atomic(using=queryset.db):
+                restored = restore_notes(notes, queryset.db)
+        except IntegrityError:
+            # Slug успели занять между проверкой и восстановлением.
+            restored = []
+        if restored:
+            self.message_user(
+                request, f'Восстановлено заметок: {len(restored)}.'
+            )
+        if len(restored) < len(notes):
+            self.message_user(
+                request,
+                'Не восстановлено заметок: '
+                f'{len(notes) - len(restored)} - их slug уже занят.',
+                messages.WARNING,
+            )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Slug целиком или начало заголовка.
+
+        Оба условия - поиск по индексу: равенство по уникальному slug
+        и диапазон по note_title_idx вместо LIKE '%...%'.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        return (
+            queryset.filter(slug=term)
+            | queryset.filter(title__gte=term, title__lt=term + PREFIX_END)
+        ), False
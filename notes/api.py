@@ -0,0 +1,262 @@
+"""JSON API заметок.
+
+NoteSync - обычное синхронное представление. Представления notes_api
+и note_api асинхронные: под ASGI они не занимают поток на время
+ожидания, а вся работа с ORM выполняется в ограниченном пуле потоков
+ORM_EXECUTOR (NOTES_API_ORM_THREADS потоков), поэтому цикл событий
+не блокируется, а число одновременных соединений с базой ограничено.
+"""
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import (
+    IntegrityError, close_old_connections, router, transaction,
+)
+from django.forms.models import model_to_dict
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views import generic
+
+from .forms import WARNING, NoteForm
+from .middleware import track_queries
+from .models import Note, NoteChange
+from .pagination import KeysetPaginator
+from .slugs import slug_taken
+
+SYNC_PAGE_SIZE = 500
+API_PAGE_SIZE = 50
+
+ORM_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.NOTES_API_ORM_THREADS,
+    thread_name_prefix='notes-orm',
+)
+
+
+def note_as_dict(note):
+    return {
+        'id': note.pk,
+        'slug': note.slug,
+        'title': note.title,
+        'text': note.text,
+        'created_at': note.created_at.isoformat(),
+        'updated_at': note.updated_at.isoformat(),
+    }
+
+
+class NoteSync(LoginRequiredMixin, generic.View):
+    """Изменения заметок пользователя после курсора ?since=.
+
+    Ответ содержит не больше SYNC_PAGE_SIZE записей журнала и курсор
+    для следующего запроса, поэтому объём синхронизации зависит от
+    числа изменений, а не от числа заметок. Несколько изменений одной
+    заметки сворачиваются в одно с её текущим состоянием.
+    """
+    raise_exception = True
+
+    def get(self, request):
+        try:
+            since = int(request.GET.get('since', 0))
+        except ValueError:
+            return JsonResponse(
+                {'error': 'Курсор since должен быть целым числом.'},
+                status=HTTPStatus.BAD_REQUEST,
+            )
+        journal = NoteChange.objects.using(
+            router.db_for_read(NoteChange, author_id=request.user.pk)
+        )
+        rows = list(
+            journal.filter(author_id=request.user.pk, id__gt=since)
+            .order_by('id')
+            .values_list('id', 'note_id', 'slug', 'deleted')
+            [:SYNC_PAGE_SIZE + 1]
+        )
+        has_more = len(rows) > SYNC_PAGE_SIZE
+        rows = rows[:SYNC_PAGE_SIZE]
+        latest = {}
+        for seq, note_id, slug, deleted in rows:
+            latest.pop(note_id, None)
+            latest[note_id] = (seq, slug, deleted)
+        notes = Note.objects.for_author(request.user).in_bulk([
+            note_id for note_id, (_, _, deleted) in latest.items()
+            if not deleted
+        ])
+        changes = []
+        for note_id, (seq, slug, deleted) in latest.items():
+            note = None if deleted else notes.get(note_id)
+            changes.append({
+                'seq': seq,
+                'id': note_id,
+                'slug': slug,
+                # Заметку могли удалить после этой записи журнала.
+                'deleted': note is None,
+                'note': note_as_dict(note) if note is not None else None,
+            })
+        return JsonResponse({
+            'changes': changes,
+            'cursor': rows[-1][0] if rows else since,
+            'has_more': has_more,
+        })
+
+
+def in_orm_pool(func):
+    """Асинхронная обёртка, выполняющая func в пуле ORM_EXECUTOR.
+
+    Соединения потоков пула закрываются так же, как в конце обычного
+    запроса: с учётом CONN_MAX_AGE и ошибок соединения.
+    """
+    func = track_queries(func)
+
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False, executor=ORM_EXECUTOR)
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _author(request):
+    # Сессия и пользователь загружаются лениво и с запросами к базе,
+    # поэтому request.user читается только в пуле.
+    user = request.user
+    return user if user.is_authenticated else None
+
+
+def _list(author, after):
+    paginator = KeysetPaginator(
+        Note.objects.for_author(author), API_PAGE_SIZE
+    )
+    page = paginator.page(after=after)
+    return {
+        'notes': [note_as_dict(note) for note in page],
+        'next': page.next_cursor,
+    }
+
+
+def _get(author, slug):
+    note = Note.objects.for_author(author).filter(slug=slug).first()
+    if note is None:
+        raise Http404('Заметка не найдена.')
+    return note
+
+
+def _save(form):
+    """Сохраняет форму как NoteFormMixin: занятый slug - ошибка формы."""
+    if form.is_valid():
+        using = router.db_for_write(Note, instance=form.instance)
+        try:
+            with transaction.atomic(using=using):
+                return note_as_dict(form.save()), None
+        except IntegrityError:
+            if not slug_taken(Note.objects.using(using), form.instance):
+                raise
+            form.add_error('slug', form.instance.slug + WARNING)
+    return None, form.errors
+
+
+def _detail(author, slug):
+    return note_as_dict(_get(author, slug))
+
+
+def _create(author, data):
+    form = NoteForm(data, instance=Note(author=author))
+    return _save(form)
+
+
+def _update(author, slug, data, partial):
+    note = _get(author, slug)
+    if partial:
+        data = {**model_to_dict(note, NoteForm._meta.fields), **data}
+    return _save(NoteForm(data, instance=note))
+
+
+def _delete(author, slug):
+    # notes.bulk импортирует notes.signals, а они через notes.events -
+    # этот модуль.
+    from .bulk import soft_delete_notes
+
+    note = _get(author, slug)
+    using = router.db_for_write(Note, instance=note)
+    with transaction.atomic(using=using):
+        soft_delete_notes([note], using)
+
+
+author_for = in_orm_pool(_author)
+list_notes = in_orm_pool(_list)
+get_note = in_orm_pool(_detail)
+create_note = in_orm_pool(_create)
+update_note = in_orm_pool(_update)
+delete_note = in_orm_pool(_delete)
+
+
+def parse_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def api_view(view):
+    """Пускает только вошедших пользователей и передаёт view автора.
+
+    Ошибки 404 (нет заметки, неверный курсор) отдаются в JSON.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        author = await author_for(request)
+        if author is None:
+            return error('Требуется вход.', HTTPStatus.FORBIDDEN)
+        try:
+            return await view(request, author, *args, **kwargs)
+        except Http404 as exc:
+            return error(str(exc), HTTPStatus.NOT_FOUND)
+    return wrapper
+
+
+def saved(note, errors, status=HTTPStatus.OK):
+    if errors:
+        return JsonResponse({'errors': errors}, status=HTTPStatus.BAD_REQUEST)
+    return JsonResponse(note, status=status)
+
+
+@api_view
+async def notes_api(request, author):
+    """GET - заметки автора по курсору ?after=, POST - новая заметка."""
+    if request.method == 'GET':
+        return JsonResponse(
+            await list_notes(author, request.GET.get('after'))
+        )
+    if request.method != 'POST':
+        return error('Метод не поддерживается.', HTTPStatus.METHOD_NOT_ALLOWED)
+    data = parse_body(request)
+    if data is None:
+        return error('Ожидается JSON-объект.', HTTPStatus.BAD_REQUEST)
+    return saved(*await create_note(author, data), HTTPStatus.CREATED)
+
+
+@api_view
+async def note_api(request, author, slug):
+    """GET - заметка, PUT и PATCH - изменение, DELETE - удаление."""
+    if request.method == 'GET':
+        return JsonResponse(await get_note(author, slug))
+    if request.method == 'DELETE':
+        await delete_note(author, slug)
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+    if request.method not in ('PUT', 'PATCH'):
+        return error('Метод не поддерживается.', HTTPStatus.METHOD_NOT_ALLOWED)
+    data = parse_body(request)
+    if data is None:
+        return error('Ожидается JSON-объект.', HTTPStatus.BAD_REQUEST)
+    return saved(*await update_note(
+        author, slug, data, partial=request.method == 'PATCH'
+    ))
@@ -0,0 +1,34 @@
+"""Бэкенд аутентификации с кешированием пользователя.
+
+AuthenticationMiddleware на каждом запросе получает пользователя
+через бэкенд из сессии. Этот бэкенд отдаёт его из кеша
+NOTES_CACHE_ALIAS на NOTES_USER_CACHE_TIMEOUT секунд, поэтому запрос
+к auth_user делается только после промаха. Проверка хеша сессии
+остаётся на месте: смена пароля по-прежнему завершает другие сессии.
+Запись удаляется при сохранении и удалении пользователя и при выходе
+(обработчики в notes.signals). Удаление видно всем процессам, только
+если кеш общий - это требует проверка notes.E001.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+from .cache import get_cache
+
+USER_KEY = 'notes:user:{}'
+
+
+def forget_user(user_id):
+    get_cache().delete(USER_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        cache = get_cache()
+        key = USER_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.NOTES_USER_CACHE_TIMEOUT)
+        return user
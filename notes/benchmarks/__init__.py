@@ -0,0 +1,139 @@
+"""Общие средства замеров производительности."""
+import json
+import math
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.test.utils import setup_databases, teardown_databases
+
+from notes.middleware import QueryCollector
+from notes.testing import isolated_caches
+
+# Рост p95, который не считается регрессией при любом tolerance:
+# у маршрутов в пару миллисекунд это шум планировщика.
+P95_SLACK_MS = 1.0
+
+
+def percentile(values, fraction):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+@contextmanager
+def count_queries():
+    """Считает запросы ко всем базам внутри блока."""
+    collector = QueryCollector()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(collector))
+        yield collector
+
+
+@contextmanager
+def isolated_databases(keepdb=False):
+    """Выполняет замеры на отдельной тестовой базе, а не на рабочей.
+
+    Кеш тоже подменяется пустым (см. notes.testing): записи,
+    накопленные рабочим сервером или прошлыми замерами, меняли бы
+    время ответов от прогона к прогону.
+    """
+    with isolated_caches():
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=keepdb
+        )
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=keepdb)
+
+
+def measure(action, iterations, warmup=0, prepare=None):
+    """Запускает action и возвращает задержки, запросы и память.
+
+    prepare выполняется перед каждым запуском вне замера и возвращает
+    именованные аргументы для action.
+    """
+    prepare = prepare or dict
+    for _ in range(warmup):
+        action(**prepare())
+    latencies = []
+    queries = 0
+    for _ in range(iterations):
+        kwargs = prepare()
+        with count_queries() as collector:
+            started = time.perf_counter()
+            action(**kwargs)
+            latencies.append(time.perf_counter() - started)
+        queries += collector.count
+    # Память меряется отдельным прогоном: tracemalloc сильно замедляет
+    # код и исказил бы задержки.
+    kwargs = prepare()
+    tracemalloc.start()
+    try:
+        action(**kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'queries': round(queries / max(iterations, 1), 2),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)
+
+
+def save_baseline(path, report):
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(report, stream, ensure_ascii=False, indent=2)
+        stream.write('\n')
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно базовой линии.
+
+    Число запросов должно совпадать или уменьшаться; задержка p95
+    может вырасти не больше чем на tolerance плюс P95_SLACK_MS.
+    Пиковая память выводится в таблице, но не проверяется: между
+    прогонами она меняется в разы из-за кешей и сборщика мусора.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f"{name}: запросов {previous['queries']} -> "
+                f"{current['queries']}"
+            )
+        limit = previous['p95_ms'] * (1 + tolerance) + P95_SLACK_MS
+        if current['p95_ms'] > limit:
+            regressions.append(
+                f"{name}: p95_ms {previous['p95_ms']} -> "
+                f"{current['p95_ms']}"
+            )
+    return regressions
+
+
+def format_table(results):
+    lines = [
+        f"{'маршрут':<24}{'p50, мс':>10}{'p95, мс':>10}"
+        f"{'запросов':>10}{'память, КБ':>12}"
+    ]
+    for name, row in results.items():
+        lines.append(
+            f"{name:<24}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+            f"{row['queries']:>10}{row['peak_kb']:>12.1f}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,88 @@
+"""Замеры сжатия страниц заметок на разных уровнях."""
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import reverse
+
+from notes.middleware import COMPRESSORS, compress
+from notes.models import Note
+from notes.seeding import create_authors, seed_notes
+
+from . import percentile
+
+User = get_user_model()
+
+LEVELS = {
+    'gzip': range(1, 10),
+    'br': range(0, 12),
+}
+# Большой текст заметки: страница заметки в основном состоит из него.
+LARGE_TEXT = ' '.join(
+    f'Абзац {index} длинной заметки о планах, встречах и покупках.'
+    for index in range(2000)
+)
+
+
+class CompressionBenchmark:
+    """Тела страниц notes: без сжатия и время их сжатия на каждом уровне."""
+
+    def __init__(self, notes=100, seed=0):
+        author_ids = create_authors(1, prefix='compression')
+        seed_notes(author_ids, notes, seed=seed)
+        author = User.objects.get(pk=author_ids[0])
+        note = Note.objects.create(
+            title='Большая заметка', text=LARGE_TEXT, author=author
+        )
+        client = Client()
+        client.force_login(author)
+        paths = {
+            'notes:list': reverse('notes:list'),
+            'notes:detail large': reverse('notes:detail', args=(note.slug,)),
+            'notes:search': reverse('notes:search') + '?q=заметка',
+        }
+        # Без Accept-Encoding middleware отдаёт тело как есть.
+        self.pages = {
+            name: client.get(path).content for name, path in paths.items()
+        }
+
+    def run(self, iterations, levels=None):
+        """Страница -> [(кодировка, уровень, размер, p50 и p95 в мс)]."""
+        levels = levels or LEVELS
+        results = {}
+        for name, content in self.pages.items():
+            rows = [('identity', None, len(content), 0.0, 0.0)]
+            for encoding in COMPRESSORS:
+                for level in levels[encoding]:
+                    latencies = []
+                    for _ in range(iterations):
+                        started = time.perf_counter()
+                        size = len(compress(content, encoding, level))
+                        latencies.append(time.perf_counter() - started)
+                    rows.append((
+                        encoding,
+                        level,
+                        size,
+                        round(percentile(latencies, 0.5) * 1000, 3),
+                        round(percentile(latencies, 0.95) * 1000, 3),
+                    ))
+            results[name] = rows
+        return results
+
+
+def format_table(results):
+    lines = []
+    for name, rows in results.items():
+        original = rows[0][2]
+        lines.append(f'{name}: {original} байт')
+        lines.append(
+            f"{'кодировка':<12}{'уровень':>8}{'байт':>10}{'доля':>8}"
+            f"{'p50, мс':>10}{'p95, мс':>10}"
+        )
+        for encoding, level, size, p50, p95 in rows[1:]:
+            lines.append(
+                f'{encoding:<12}{level:>8}{size:>10}'
+                f'{size / original:>8.1%}{p50:>10.3f}{p95:>10.3f}'
+            )
+        lines.append('')
+    return '\n'.join(lines)
@@ -0,0 +1,155 @@
+"""Конкурентные запросы: асинхронный JSON API против HTML-страниц.
+
+HTML-страницы обслуживаются как под многопоточным WSGI-сервером -
+по потоку на одновременный запрос. API вызывается через AsyncClient,
+то есть через асинхронную цепочку middleware, в одном цикле событий.
+Параллельно с API в цикле работает таймер: его запаздывание (p95)
+показывает, блокировал ли кто-то цикл событий. Небольшое запаздывание
+остаётся и без блокировок: потоки пула конкурируют с циклом за GIL.
+"""
+import asyncio
+import random
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from notes.models import Note
+from notes.seeding import create_authors, seed_notes
+
+from . import percentile
+
+User = get_user_model()
+
+TICK = 0.001
+
+
+def summary(latencies, elapsed):
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+    }
+
+
+class ConcurrencyBenchmark:
+    """Один автор с заметками и пары маршрутов "API - HTML"."""
+
+    def __init__(self, notes=200, seed=0):
+        self.random = random.Random(seed)
+        author_ids = create_authors(1, prefix='concurrency')
+        seed_notes(author_ids, notes, seed=seed)
+        self.author = User.objects.get(pk=author_ids[0])
+        self.slugs = list(
+            Note.objects.for_author(self.author)
+            .values_list('slug', flat=True)
+        )
+
+    def paths(self, kind):
+        """Имя сценария -> функция, возвращающая путь запроса."""
+        api = kind == 'api'
+        return {
+            'list': lambda: reverse('notes:api-list' if api else 'notes:list'),
+            'detail': lambda: reverse(
+                'notes:api-detail' if api else 'notes:detail',
+                args=(self.random.choice(self.slugs),),
+            ),
+        }
+
+    def run_wsgi(self, path, concurrency, requests):
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(client):
+            own = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                client.get(path())
+                own.append(time.perf_counter() - started)
+            with lock:
+                latencies.extend(own)
+
+        # Вход пишет в базу; делаем его заранее, а не из потоков.
+        threads = []
+        for _ in range(concurrency):
+            client = Client()
+            client.force_login(self.author)
+            threads.append(threading.Thread(target=worker, args=(client,)))
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return summary(latencies, time.perf_counter() - started)
+
+    def run_asgi(self, path, concurrency, requests):
+        client = AsyncClient()
+        # Вход через базу - до запуска цикла событий.
+        client.force_login(self.author)
+        latencies = []
+
+        async def worker():
+            for _ in range(requests):
+                started = time.perf_counter()
+                await client.get(path())
+                latencies.append(time.perf_counter() - started)
+
+        async def ticker(done, lags):
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(TICK)
+                lags.append(time.perf_counter() - started - TICK)
+
+        async def main():
+            done = asyncio.Event()
+            lags = []
+            tick = asyncio.create_task(ticker(done, lags))
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+            done.set()
+            await tick
+            return elapsed, lags
+
+        elapsed, lags = asyncio.run(main())
+        result = summary(latencies, elapsed)
+        result['loop_lag_p95_ms'] = round(percentile(lags, 0.95) * 1000, 3)
+        return result
+
+    def run(self, concurrency_levels, requests):
+        """Сценарий -> одновременных запросов -> {'wsgi': ..., 'asgi': ...}.
+
+        requests - число запросов на каждого одновременного клиента.
+        """
+        wsgi, asgi = self.paths('html'), self.paths('api')
+        results = {}
+        for name in wsgi:
+            results[name] = {
+                concurrency: {
+                    'wsgi': self.run_wsgi(wsgi[name], concurrency, requests),
+                    'asgi': self.run_asgi(asgi[name], concurrency, requests),
+                }
+                for concurrency in concurrency_levels
+            }
+        return results
+
+
+def format_table(results):
+    lines = [
+        f"{'сценарий':<10}{'клиентов':>9}"
+        f"{'HTML rps':>10}{'HTML p95':>10}"
+        f"{'API rps':>10}{'API p95':>10}{'лаг цикла':>11}"
+    ]
+    for name, levels in results.items():
+        for concurrency, row in levels.items():
+            wsgi, asgi = row['wsgi'], row['asgi']
+            lines.append(
+                f'{name:<10}{concurrency:>9}'
+                f"{wsgi['rps']:>10.1f}{wsgi['p95_ms']:>10.2f}"
+                f"{asgi['rps']:>10.1f}{asgi['p95_ms']:>10.2f}"
+                f"{asgi['loop_lag_p95_ms']:>11.2f}"
+            )
+    return '\n'.join(lines)
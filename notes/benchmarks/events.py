@@ -0,0 +1,88 @@
+"""Стоимость простаивающих соединений потока событий."""
+import asyncio
+import time
+import tracemalloc
+
+from notes.events import EventStream, Subscription, publish
+
+from . import percentile
+
+
+class EventsBenchmark:
+    """connections соединений, поровну на authors авторов.
+
+    Соединения открываются без HTTP-сервера и входа: замеряются только
+    подписка, очередь и корутина EventStream.stream.
+    """
+
+    def __init__(self, connections, authors=100):
+        self.connections = connections
+        self.authors = authors
+
+    async def measure(self, publishes):
+        app = EventStream()
+        delivered = asyncio.Event()
+        received = 0
+        target = self.connections // self.authors
+
+        async def send(message):
+            nonlocal received
+            if message['body'].startswith(b'event:'):
+                received += 1
+                if received == target:
+                    delivered.set()
+
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            subscriptions = [
+                Subscription(index % self.authors, size=100)
+                for index in range(self.connections)
+            ]
+            tasks = [
+                asyncio.ensure_future(app.stream(subscription, send))
+                for subscription in subscriptions
+            ]
+            # Корутины доходят до ожидания в очереди.
+            await asyncio.sleep(0.1)
+            used = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+
+        latencies = []
+        for number in range(publishes):
+            received = 0
+            delivered.clear()
+            started = time.perf_counter()
+            publish(0, {'type': 'updated', 'id': number})
+            await delivered.wait()
+            latencies.append(time.perf_counter() - started)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for subscription in subscriptions:
+            subscription.close()
+        return {
+            'connections': self.connections,
+            'kb_per_connection': round(used / self.connections / 1024, 2),
+            'fanout': target,
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        }
+
+    def run(self, publishes=50):
+        return asyncio.run(self.measure(publishes))
+
+
+def format_table(rows):
+    lines = [
+        f"{'соединений':>11}{'КБ на одно':>12}{'получателей':>13}"
+        f"{'p50, мс':>10}{'p95, мс':>10}"
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['connections']:>11}{row['kb_per_connection']:>12.2f}"
+            f"{row['fanout']:>13}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,144 @@
+"""Сценарии замеров для всех маршрутов notes: и users:."""
+import itertools
+import random
+
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import reverse
+
+from notes.models import Note
+from notes.seeding import create_authors, seed_notes
+
+User = get_user_model()
+
+PASSWORD = 'benchmark-password'
+
+
+class RouteBenchmark:
+    """Набор данных и запросы к каждому маршруту приложения."""
+
+    def __init__(self, authors, notes, seed=0):
+        self.random = random.Random(seed)
+        self.counter = itertools.count()
+        author_ids = create_authors(authors, prefix='bench', password=PASSWORD)
+        seed_notes(author_ids, notes, seed=seed)
+        self.author = User.objects.get(pk=author_ids[0])
+        self.slugs = list(
+            Note.objects.filter(author=self.author)
+            .order_by('pk').values_list('slug', flat=True)
+        )
+        # Курсор почти в конце списка: проверяем, что глубокие
+        # страницы не медленнее первой.
+        self.deep_cursor = (
+            Note.objects.filter(author=self.author)
+            .order_by('-pk').values_list('pk', flat=True)[50:51].get()
+            if len(self.slugs) > 51 else 0
+        )
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.anonymous = Client()
+
+    def random_slug(self):
+        return {'slug': self.random.choice(self.slugs)}
+
+    def disposable_note(self):
+        """Заметка, которую сценарий удалит."""
+        note = Note.objects.create(
+            title='Удаляемая',
+            text='Текст',
+            slug=f'bench-disposable-{next(self.counter)}',
+            author=self.author,
+        )
+        return {'slug': note.slug}
+
+    def logged_in_client(self):
+        client = Client()
+        client.force_login(self.author)
+        return {'client': client}
+
+    def scenarios(self):
+        """Имя маршрута -> (действие, подготовка)."""
+        client = self.client
+        return {
+            'notes:home': (
+                lambda: client.get(reverse('notes:home')), None
+            ),
+            'notes:list': (
+                lambda: client.get(reverse('notes:list')), None
+            ),
+            'notes:list deep': (
+                lambda: client.get(
+                    reverse('notes:list'), {'after': self.deep_cursor}
+                ),
+                None,
+            ),
+            'notes:detail': (
+                lambda slug: client.get(reverse('notes:detail', args=(slug,))),
+                self.random_slug,
+            ),
+            'notes:add GET': (
+                lambda: client.get(reverse('notes:add')), None
+            ),
+            'notes:add POST': (
+                lambda: client.post(reverse('notes:add'), {
+                    'title': 'Новая заметка',
+                    'text': 'Текст новой заметки',
+                }),
+                None,
+            ),
+            'notes:edit GET': (
+                lambda slug: client.get(reverse('notes:edit', args=(slug,))),
+                self.random_slug,
+            ),
+            'notes:edit POST': (
+                lambda slug: client.post(
+                    reverse('notes:edit', args=(slug,)),
+                    {'title': 'Изменённая', 'text': 'Текст', 'slug': slug},
+                ),
+                self.random_slug,
+            ),
+            'notes:delete GET': (
+                lambda slug: client.get(
+                    reverse('notes:delete', args=(slug,))
+                ),
+                self.random_slug,
+            ),
+            'notes:delete POST': (
+                lambda slug: client.post(
+                    reverse('notes:delete', args=(slug,))
+                ),
+                self.disposable_note,
+            ),
+            'notes:search': (
+                lambda: client.get(reverse('notes:search'), {'q': 'заметка'}),
+                None,
+            ),
+            'notes:sync': (
+                lambda: client.get(reverse('notes:sync')), None
+            ),
+            'users:login GET': (
+                lambda: self.anonymous.get(reverse('users:login')), None
+            ),
+            'users:login POST': (
+                lambda: Client().post(reverse('users:login'), {
+                    'username': self.author.username,
+                    'password': PASSWORD,
+                }),
+                None,
+            ),
+            'users:logout': (
+                lambda client: client.get(reverse('users:logout')),
+                self.logged_in_client,
+            ),
+            'users:signup GET': (
+                lambda: self.anonymous.get(reverse('users:signup')), None
+            ),
+            'users:signup POST': (
+                lambda: Client().post(reverse('users:signup'), {
+                    'username': f'bench-new-{next(self.counter)}',
+                    'password1': PASSWORD,
+                    'password2': PASSWORD,
+                }),
+                None,
+            ),
+        }
@@ -0,0 +1,120 @@
+"""Замеры отрисовки шаблонов заметок."""
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template import RequestContext
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.urls import reverse
+
+from notes.forms import NoteForm
+from notes.models import Note
+from notes.pagination import KeysetPage
+from notes.seeding import create_authors, seed_notes
+
+from . import measure
+
+User = get_user_model()
+
+TEMPLATES = ('notes/list.html', 'notes/detail.html', 'notes/form.html')
+PAGE_SIZE = 50
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def make_engine(cached):
+    """Движок с настройками проекта и с кешем шаблонов или без него."""
+    params = copy.deepcopy(settings.TEMPLATES[0])
+    loaders = LOADERS
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', LOADERS)]
+    params['OPTIONS']['loaders'] = loaders
+    params.update(NAME='cached' if cached else 'uncached', APP_DIRS=False)
+    del params['BACKEND']
+    return DjangoTemplates(params).engine
+
+
+class TemplateBenchmark:
+    """Контексты страниц списка, заметки и формы одного автора."""
+
+    def __init__(self, notes=PAGE_SIZE, seed=0):
+        author_ids = create_authors(1, prefix='templates')
+        seed_notes(author_ids, notes, seed=seed)
+        self.author = User.objects.get(pk=author_ids[0])
+        notes = list(
+            Note.objects.for_author(self.author).order_by('-pk')[:PAGE_SIZE]
+        )
+        note = notes[0]
+        self.contexts = {
+            'notes/list.html': (reverse('notes:list'), {
+                'object_list': notes,
+                'is_paginated': True,
+                'page_obj': KeysetPage(notes, next_cursor=notes[-1].pk),
+            }),
+            'notes/detail.html': (
+                reverse('notes:detail', args=(note.slug,)),
+                {'note': note, 'object': note},
+            ),
+            'notes/form.html': (
+                reverse('notes:edit', args=(note.slug,)),
+                {'form': NoteForm(instance=note), 'object': note},
+            ),
+        }
+        self.header_key = make_template_fragment_key(
+            'header', [self.author.pk, self.author.username]
+        )
+
+    def request(self, path):
+        request = RequestFactory().get(path)
+        request.user = self.author
+        return request
+
+    def render(self, engine, name, cold_header):
+        path, context = self.contexts[name]
+        if cold_header:
+            cache.delete(self.header_key)
+        engine.get_template(name).render(
+            RequestContext(self.request(path), context)
+        )
+
+    def run(self, iterations, warmup=0):
+        """Задержки "до" и "после" для каждого шаблона.
+
+        "До" - шаблоны читаются и компилируются при каждой отрисовке,
+        шапка строится заново. "После" - скомпилированные шаблоны
+        и шапка берутся из кеша, как в настройках проекта.
+        """
+        variants = {
+            'before': (make_engine(cached=False), True),
+            'after': (make_engine(cached=True), False),
+        }
+        results = {}
+        for name in TEMPLATES:
+            results[name] = {
+                variant: measure(
+                    lambda: self.render(engine, name, cold_header),
+                    iterations,
+                    warmup=warmup,
+                )
+                for variant, (engine, cold_header) in variants.items()
+            }
+        return results
+
+
+def format_table(results):
+    lines = [
+        f"{'шаблон':<20}{'до p50':>10}{'до p95':>10}"
+        f"{'после p50':>12}{'после p95':>12}"
+    ]
+    for name, row in results.items():
+        before, after = row['before'], row['after']
+        lines.append(
+            f"{name:<20}{before['p50_ms']:>10.2f}{before['p95_ms']:>10.2f}"
+            f"{after['p50_ms']:>12.2f}{after['p95_ms']:>12.2f}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,121 @@
+"""Нагрузка конкурентной записью на отдельную базу SQLite."""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError, connections, transaction
+
+from notes.bulk import bulk_create_notes
+from notes.models import Note
+
+from . import percentile
+
+User = get_user_model()
+
+PLAIN_PROFILE = {'ENGINE': 'django.db.backends.sqlite3'}
+
+
+def profile_settings(profile):
+    """Настройки базы для профиля из DATABASE_PROFILES."""
+    if profile == 'default':
+        return dict(PLAIN_PROFILE)
+    return dict(settings.DATABASE_PROFILES[profile])
+
+
+class WriteStress:
+    """Потоки, которые создают и редактируют заметки одного автора.
+
+    Правка - как в NoteUpdate с проверкой версии: в одной транзакции
+    заметка читается и сохраняется. Именно такие транзакции при
+    обычном BEGIN получают "database is locked" без ожидания.
+    """
+
+    def __init__(self, path, profile, notes=100):
+        self.alias = f'stress-{profile}'
+        connections.databases[self.alias] = {
+            **profile_settings(profile), 'NAME': str(path),
+        }
+        call_command('migrate', database=self.alias, verbosity=0)
+        self.author = User.objects.db_manager(self.alias).create(
+            username='stress'
+        )
+        self.note_ids = [
+            note.pk for note in bulk_create_notes(
+                (
+                    Note(
+                        title=f'Заметка {index}',
+                        text='Текст',
+                        slug=f'stress-{index}',
+                        author=self.author,
+                    )
+                    for index in range(notes)
+                ),
+                using=self.alias,
+            )
+        ]
+        connections[self.alias].close()
+
+    def create(self, number):
+        Note(
+            title=f'Новая заметка {number}',
+            text='Текст',
+            author=self.author,
+        ).save(using=self.alias)
+
+    def update(self, number):
+        with transaction.atomic(using=self.alias):
+            note = Note.objects.using(self.alias).get(
+                pk=self.note_ids[number % len(self.note_ids)]
+            )
+            note.text = f'Правка {number}'
+            note.save(using=self.alias)
+
+    def writer(self, index, operations, results):
+        latencies = []
+        errors = 0
+        try:
+            for number in range(operations):
+                action = self.create if number % 2 else self.update
+                started = time.perf_counter()
+                try:
+                    action(index * operations + number)
+                except OperationalError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connections[self.alias].close()
+        results[index] = (latencies, errors)
+
+    def run(self, writers, operations):
+        results = {}
+        threads = [
+            threading.Thread(
+                target=self.writer, args=(index, operations, results)
+            )
+            for index in range(writers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        latencies = [
+            latency for thread_latencies, _ in results.values()
+            for latency in thread_latencies
+        ]
+        errors = sum(thread_errors for _, thread_errors in results.values())
+        return {
+            'operations': len(latencies),
+            'errors': errors,
+            'error_rate': round(errors / max(len(latencies), 1), 4),
+            'ops_per_s': round(len(latencies) / elapsed, 1),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        }
+
+    def close(self):
+        connections[self.alias].close()
+        del connections[self.alias]
+        del connections.databases[self.alias]
@@ -0,0 +1,133 @@
+"""Массовое создание и удаление заметок в обход Note.save()."""
+from django.db import router, transaction
+from django.utils import timezone
+
+from .models import Note, NoteRevision, NoteTerm
+from .signals import notes_bulk_created, notes_bulk_deleted
+
+
+def group_by_database(notes):
+    """Раскладывает заметки по базам, которые выбирает роутер."""
+    groups = {}
+    for note in notes:
+        alias = router.db_for_write(Note, instance=note)
+        groups.setdefault(alias, []).append(note)
+    return groups
+
+
+def bulk_create_notes(notes, using=None):
+    """Создаёт заметки одним bulk_create в транзакции.
+
+    Slug должны быть уже подобраны (см. notes.slugs.allocate_slugs).
+    Обработчики notes_bulk_created обновляют поисковый индекс, кеш
+    и журнал синхронизации для всей пачки сразу. Без using пачка
+    делится по базам авторов, и каждая часть - своя транзакция.
+    """
+    notes = list(notes)
+    if not notes:
+        return notes
+    if using is None:
+        for alias, group in group_by_database(notes).items():
+            bulk_create_notes(group, using=alias)
+        return notes
+    with transaction.atomic(using=using):
+        Note.objects.using(using).bulk_create(notes)
+        if notes[0].pk is None:
+            # SQLite не возвращает id из bulk_create: получаем их
+            # одним запросом по уникальным slug.
+            ids = dict(
+                Note.objects.using(using)
+                .filter(slug__in=[note.slug for note in notes])
+                .values_list('slug', 'pk')
+            )
+            for note in notes:
+                note.pk = ids[note.slug]
+        notes_bulk_created.send(sender=Note, notes=notes, using=using)
+    return notes
+
+
+def soft_delete_notes(notes, using):
+    """Помечает заметки удалёнными одним UPDATE.
+
+    notes - заметки одной базы using с заполненными pk, slug, title
+    и author_id. Вызывать внутри транзакции: обработчики
+    notes_bulk_deleted обновляют кеш, журнал синхронизации и события
+    для всей пачки сразу, а поисковый индекс - фоновой задачей
+    notes.reindex_notes. Строки остаются в таблице, пока их не удалит
+    purge_notes().
+    """
+    Note.objects.using(using).filter(
+        pk__in=[note.pk for note in notes]
+    ).update(deleted_at=timezone.now())
+    notes_bulk_deleted.send(sender=Note, notes=notes, using=using)
+
+
+def restore_notes(notes, using):
+    """Снимает пометку удаления с заметок одним UPDATE.
+
+    notes - загруженные заметки одной базы using. Вызывать внутри
+    транзакции: для восстановленных заметок, как для созданных,
+    обработчики notes_bulk_created обновляют поисковый индекс, кеш
+    и журнал синхронизации. Заметка, чей slug уже занят неудалённой,
+    не восстанавливается. Возвращает восстановленные заметки.
+    """
+    taken = set(
+        Note.objects.using(using)
+        .filter(slug__in=[note.slug for note in notes])
+        .values_list('slug', flat=True)
+    )
+    restored = []
+    for note in notes:
+        if note.slug not in taken:
+            taken.add(note.slug)
+            restored.append(note)
+    if restored:
+        Note.all_objects.using(using).filter(
+            pk__in=[note.pk for note in restored]
+        ).update(deleted_at=None)
+        for note in restored:
+            note.deleted_at = None
+        notes_bulk_created.send(sender=Note, notes=restored, using=using)
+    return restored
+
+
+def bulk_delete_notes(author, ids):
+    """Удаляет заметки автора с id из ids одной транзакцией.
+
+    Возвращает удалённые заметки (только id, slug и заголовок).
+    """
+    using = router.db_for_write(Note, author_id=author.pk)
+    notes = Note.objects.using(using).for_author(author)
+    with transaction.atomic(using=using):
+        deleted = [
+            Note(pk=pk, slug=slug, title=title, author_id=author.pk)
+            for pk, slug, title in notes.filter(pk__in=ids).values_list(
+                'pk', 'slug', 'title'
+            )
+        ]
+        if deleted:
+            soft_delete_notes(deleted, using)
+    return deleted
+
+
+def purge_notes(before, using, batch_size):
+    """Окончательно удаляет пачку заметок, удалённых раньше before.
+
+    Обычный QuerySet.delete() из-за обработчиков post_delete загрузил
+    бы заметки целиком и повторил побочные эффекты удаления, которые
+    уже выполнил soft_delete_notes(). Поэтому заметки и их ревизии
+    удаляются по запросу на таблицу. Возвращает число удалённых.
+    """
+    with transaction.atomic(using=using):
+        pks = list(
+            Note.all_objects.using(using)
+            .filter(deleted_at__lt=before)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if pks:
+            NoteRevision.objects.using(using).filter(note_id__in=pks).delete()
+            NoteTerm.objects.using(using).filter(note_id__in=pks).delete()
+            Note.all_objects.using(using).filter(pk__in=pks)._raw_delete(
+                using
+            )
+    return len(pks)
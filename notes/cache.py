@@ -0,0 +1,101 @@
+"""Кеш страниц заметок с версионированием по автору.
+
+Каждый ключ содержит номер версии автора. Любое изменение его заметок
+увеличивает номер, и старые записи просто перестают запрашиваться,
+пока их не вытеснит сам кеш. Поэтому перебирать ключи при
+инвалидации не нужно, а устаревшая страница не может быть отдана.
+
+Версии меняются после фиксации транзакции (notes.signals) и должны
+быть видны всем процессам, поэтому кеш NOTES_CACHE_ALIAS обязан быть
+общим: локальный кеш процесса отклоняет проверка notes.E001.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'notes:version:{}'
+PAGE_KEY = 'notes:page:{}:{}:r{}:{}'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.NOTES_CACHE_ALIAS]
+
+
+def _initial_version():
+    # Версия может пропасть из кеша при вытеснении. Новая начинается
+    # с текущего времени, чтобы не совпасть ни с одной из прежних.
+    return time.time_ns()
+
+
+def get_version(user_id):
+    """Текущая версия кеша пользователя."""
+    cache = get_cache()
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(user_ids):
+    """Делает недействительными все закешированные страницы авторов."""
+    cache = get_cache()
+    for user_id in set(user_ids):
+        key = VERSION_KEY.format(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+
+
+def bump_version(user_id):
+    bump_versions([user_id])
+
+
+def page_key(user_id, path, render_version):
+    """Ключ страницы; render_version - notes.rendering.RENDER_VERSION.
+
+    Смена правил отрисовки Markdown меняет все ключи, как и правка
+    заметок - версию автора.
+    """
+    return PAGE_KEY.format(
+        user_id, get_version(user_id), render_version, path
+    )
+
+
+def get_page(key):
+    """Возвращает закешированную страницу и учитывает попадание."""
+    page = get_cache().get(key)
+    with _stats_lock:
+        _stats['hits' if page is not None else 'misses'] += 1
+    return page
+
+
+def set_page(key, content, content_type):
+    get_cache().set(
+        key, (content, content_type), settings.NOTES_CACHE_TIMEOUT
+    )
+
+
+def get_stats():
+    """Счётчики попаданий и промахов текущего процесса."""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
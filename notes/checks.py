@@ -0,0 +1,44 @@
+"""Проверки настроек приложения notes (manage.py check)."""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.checks import Error, register
+
+# Бэкенды, которые хранят данные в памяти одного процесса.
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Кеш сессий, пользователей и страниц должен быть общим.
+
+    Иначе выход, смена пароля или правка заметки сбрасывают кеш
+    только в обработавшем их процессе, а остальные продолжают
+    отдавать сессию, пользователя и страницы из своей памяти.
+    """
+    aliases = {settings.NOTES_CACHE_ALIAS}
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        aliases.add(settings.SESSION_CACHE_ALIAS)
+    return [
+        Error(
+            f'Кеш {alias!r} хранится в памяти процесса.',
+            hint='Укажите общий для процессов бэкенд: файловый, '
+                 'memcached или redis.',
+            obj=settings.CACHES[alias]['BACKEND'],
+            id='notes.E001',
+        )
+        for alias in sorted(aliases)
+        if settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_CACHES
+    ]
+
+
+def ensure_shared_cache():
+    """Прерывает запуск сервера приложений без общего кеша.
+
+    Серверы WSGI и ASGI системные проверки Django не выполняют.
+    """
+    for error in check_shared_cache(None):
+        raise ImproperlyConfigured(f'{error.msg} {error.hint}')
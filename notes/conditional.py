@@ -0,0 +1,48 @@
+"""ETag и Last-Modified для страниц заметок.
+
+Функции рассчитаны на django.views.decorators.http.condition:
+версия вычисляется без отрисовки шаблона, поэтому повторный запрос
+с If-None-Match получает 304 сразу.
+"""
+from . import cache, rendering
+from .models import Note
+
+
+def _note_state(request, slug):
+    # condition() вызывает функции для ETag и Last-Modified по очереди,
+    # а запрос к базе нужен один - запоминаем результат в запросе.
+    states = request.__dict__.setdefault('_note_states', {})
+    if slug not in states:
+        states[slug] = (
+            Note.objects.for_author(request.user).filter(slug=slug)
+            .values_list('pk', 'updated_at')
+            .first()
+        )
+    return states[slug]
+
+
+def note_etag(request, slug):
+    """Версия заметки: меняется при каждом сохранении и при смене
+    правил отрисовки Markdown.
+    """
+    state = _note_state(request, slug)
+    if state is None:
+        return None
+    pk, updated_at = state
+    timestamp = int(updated_at.timestamp() * 1_000_000)
+    return f'{pk}-{timestamp}-r{rendering.RENDER_VERSION}'
+
+
+def note_last_modified(request, slug):
+    state = _note_state(request, slug)
+    return state[1] if state is not None else None
+
+
+def notes_list_etag(request, *args, **kwargs):
+    """Версия списка - версия кеша автора, запрос к базе не нужен.
+
+    Last-Modified для списка не отдаётся: по наибольшему updated_at
+    нельзя заметить удаление заметки.
+    """
+    user_id = request.user.pk
+    return f'{user_id}-{cache.get_version(user_id)}'
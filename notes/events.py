@@ -0,0 +1,211 @@
+"""События об изменении заметок для открытых страниц автора.
+
+Обработчики в notes.signals после фиксации транзакции публикуют
+событие в канал автора. Доставкой между издателями и подписчиками
+занимается бэкенд из NOTES_EVENTS_BACKEND: LocalBackend передаёт
+события только внутри процесса, бэкенд на общей шине (например,
+Redis) может реализовать тот же интерфейс.
+
+EventStream - отдельное ASGI-приложение (см. yanote/asgi.py), которое
+отдаёт события в формате Server-Sent Events. Соединение не занимает
+поток: это одна корутина и ограниченная очередь, поэтому тысячи
+простаивающих вкладок обходятся дёшево.
+"""
+import asyncio
+import json
+import threading
+from http import HTTPStatus
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.http import HttpRequest
+from django.http.cookie import parse_cookie
+from django.utils.module_loading import import_string
+
+from .api import in_orm_pool
+
+STREAM_PATH = '/events/'
+
+
+class LocalBackend:
+    """Подписки в памяти процесса.
+
+    Слушатели вызываются в потоке издателя и не должны блокироваться.
+    """
+
+    def __init__(self):
+        self.listeners = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel, listener):
+        with self.lock:
+            self.listeners.setdefault(channel, set()).add(listener)
+
+    def unsubscribe(self, channel, listener):
+        with self.lock:
+            listeners = self.listeners.get(channel)
+            if listeners is not None:
+                listeners.discard(listener)
+                if not listeners:
+                    del self.listeners[channel]
+
+    def publish(self, channel, event):
+        with self.lock:
+            listeners = list(self.listeners.get(channel, ()))
+        for listener in listeners:
+            listener(event)
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.NOTES_EVENTS_BACKEND)()
+    return _backend
+
+
+def channel_for(author_id):
+    return f'notes:{author_id}'
+
+
+def publish(author_id, event):
+    get_backend().publish(channel_for(author_id), event)
+
+
+def note_event(kind, note):
+    return {
+        'type': kind,
+        'id': note.pk,
+        'slug': note.slug,
+        'title': note.title,
+    }
+
+
+class Subscription:
+    """Очередь событий одного соединения.
+
+    Если клиент не успевает читать и очередь заполнилась, накопленные
+    события заменяются одним событием reset: странице проще
+    перечитать список, чем получить его по частям.
+    """
+
+    def __init__(self, author_id, size):
+        self.channel = channel_for(author_id)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(size)
+        get_backend().subscribe(self.channel, self.listener)
+
+    def listener(self, event):
+        # Издатель работает в другом потоке, очередь - в цикле событий.
+        self.loop.call_soon_threadsafe(self.put, event)
+
+    def put(self, event):
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {'type': 'reset'}
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """Следующее событие или None, если за timeout событий не было."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        get_backend().unsubscribe(self.channel, self.listener)
+
+
+def format_event(event):
+    return (
+        f"event: {event['type']}\n"
+        f'data: {json.dumps(event, ensure_ascii=False)}\n\n'
+    ).encode()
+
+
+@in_orm_pool
+def load_author_id(session_key):
+    """Возвращает id вошедшего пользователя по ключу сессии или None."""
+    request = HttpRequest()
+    engine = import_module(settings.SESSION_ENGINE)
+    request.session = engine.SessionStore(session_key)
+    user = get_user(request)
+    return user.pk if user.is_authenticated else None
+
+
+class EventStream:
+    """ASGI-приложение: события заметок вошедшего пользователя.
+
+    Раз в NOTES_EVENTS_HEARTBEAT секунд в поток пишется комментарий,
+    чтобы прокси не закрывали простаивающее соединение, а сервер
+    узнавал об ушедших клиентах.
+    """
+
+    async def __call__(self, scope, receive, send):
+        author_id = await self.author(scope)
+        if author_id is None:
+            await self.reject(send)
+            return
+        subscription = Subscription(
+            author_id, settings.NOTES_EVENTS_QUEUE_SIZE
+        )
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': HTTPStatus.OK,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            stream = asyncio.ensure_future(self.stream(subscription, send))
+            disconnect = asyncio.ensure_future(self.disconnect(receive))
+            await asyncio.wait(
+                (stream, disconnect), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in (stream, disconnect):
+                task.cancel()
+            await asyncio.gather(stream, disconnect, return_exceptions=True)
+        finally:
+            subscription.close()
+
+    async def author(self, scope):
+        cookies = {}
+        for name, value in scope.get('headers', ()):
+            if name == b'cookie':
+                cookies.update(parse_cookie(value.decode('latin-1')))
+        session_key = cookies.get(settings.SESSION_COOKIE_NAME)
+        if session_key is None:
+            return None
+        return await load_author_id(session_key)
+
+    async def reject(self, send):
+        await send({
+            'type': 'http.response.start',
+            'status': HTTPStatus.FORBIDDEN,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': 'Требуется вход.'.encode(),
+        })
+
+    async def stream(self, subscription, send):
+        heartbeat = settings.NOTES_EVENTS_HEARTBEAT
+        while True:
+            event = await subscription.get(heartbeat)
+            body = b': ping\n\n' if event is None else format_event(event)
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': True,
+            })
+
+    async def disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
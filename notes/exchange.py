@@ -0,0 +1,69 @@
+"""Построчное чтение и запись заметок в форматах JSONL и CSV."""
+import csv
+import json
+
+FORMATS = ('jsonl', 'csv')
+FIELDS = ('title', 'text', 'slug', 'author')
+
+
+def guess_format(path, default='jsonl'):
+    """Формат по расширению файла."""
+    for fmt in FORMATS:
+        if str(path).endswith(f'.{fmt}'):
+            return fmt
+    return default
+
+
+def read_records(stream, fmt):
+    """Лениво читает записи из потока, не загружая его целиком."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+class RecordWriter:
+    """Пишет записи в поток по одной."""
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == 'csv':
+            self._csv = csv.DictWriter(stream, fieldnames=FIELDS)
+            self._csv.writeheader()
+
+    def write(self, record):
+        if self.fmt == 'csv':
+            self._csv.writerow(record)
+        else:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+class _Buffer:
+    """Поток, который отдаёт записанное по запросу и не копит его."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, value):
+        self.chunks.append(value)
+
+    def pop(self):
+        value = ''.join(self.chunks)
+        self.chunks.clear()
+        return value
+
+
+def iter_records(records, fmt):
+    """Записи в формате fmt по одной строке - для StreamingHttpResponse."""
+    buffer = _Buffer()
+    writer = RecordWriter(buffer, fmt)
+    header = buffer.pop()
+    if header:
+        yield header
+    for record in records:
+        writer.write(record)
+        yield buffer.pop()
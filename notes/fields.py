@@ -0,0 +1,95 @@
+"""Текстовое поле со сжатием больших значений."""
+import zlib
+
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+# Первый байт хранимого значения - способ кодирования.
+PLAIN = b'p'
+ZLIB = b'z'
+
+
+class StoredText(bytes):
+    """Сжатое значение из базы, ещё не распакованное."""
+
+
+def decode_text(value):
+    """Превращает хранимое значение в строку."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value[:1] == ZLIB:
+        return zlib.decompress(value[1:]).decode()
+    return value[1:].decode()
+
+
+def encode_text(value):
+    """Кодирует строку для хранения, сжимая её при необходимости."""
+    data = value.encode()
+    min_size = settings.NOTES_TEXT_COMPRESS_MIN_SIZE
+    if min_size is not None and len(data) >= min_size:
+        compressed = zlib.compress(data, settings.NOTES_TEXT_COMPRESS_LEVEL)
+        if len(compressed) < len(data):
+            return ZLIB + compressed
+    return PLAIN + data
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """Распаковывает значение при первом обращении к атрибуту."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, StoredText):
+            value = decode_text(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        # Дескриптор данных: иначе значение из __dict__ экземпляра
+        # перекрыло бы __get__ и распаковка не сработала бы.
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    """TextField, который хранит большие значения сжатыми через zlib.
+
+    Значения короче NOTES_TEXT_COMPRESS_MIN_SIZE байт хранятся как есть.
+    Сжатые значения распаковываются только при обращении к атрибуту,
+    поэтому выборки, которые текст не используют, не тратят на это
+    время. Поиск по содержимому поля средствами СУБД невозможен.
+    """
+    descriptor_class = CompressedTextDescriptor
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, str):
+            # Строки остаются от данных, записанных до сжатия.
+            return value
+        value = bytes(value)
+        if value[:1] == ZLIB:
+            return StoredText(value)
+        return decode_text(value)
+
+    def to_python(self, value):
+        if isinstance(value, StoredText):
+            return decode_text(value)
+        return super().to_python(value)
+
+    def pre_save(self, model_instance, add):
+        # Читаем напрямую, чтобы не распаковывать неизменённый текст.
+        return model_instance.__dict__.get(self.attname)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if isinstance(value, StoredText):
+            return connection.Database.Binary(bytes(value))
+        return connection.Database.Binary(encode_text(str(value)))
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
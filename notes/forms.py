@@ -1,29 +1,17 @@
-from pytils.translit import slugify
-
 from django import forms
-from django.core.exceptions import ValidationError
 
 from .models import Note
-
-WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+from .slugs import WARNING  # noqa: F401
 
 
 class NoteForm(forms.ModelForm):
-    """Форма для создания или обновления заметки."""
+    """Форма для создания или обновления заметки.
+
+    Если slug не указан, его подберёт Note.save() через notes.slugs.
+    Занятый slug отклоняется проверкой уникальности модели
+    с сообщением WARNING.
+    """
 
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
-
-    def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
@@ -0,0 +1,176 @@
+"""Фоновые задачи в таблице Job.
+
+enqueue() добавляет строку в ту же базу и в той же транзакции, что
+и изменение, ради которого ставится задача. Исполнители увидят
+её только после фиксации транзакции, а при откате задача исчезнет
+вместе с изменением. Запрос платит за одну вставку.
+
+Исполнители (manage.py run_workers) захватывают задачи условным
+UPDATE, поэтому одна задача не выполняется двумя исполнителями
+одновременно. Если исполнитель упал, по истечении аренды задачу
+заберёт другой. Упавшая задача повторяется с экспоненциальной
+задержкой, пока не исчерпает NOTES_JOBS_MAX_ATTEMPTS попыток.
+Из-за повторов задачи должны быть идемпотентными: приводить данные
+к текущему состоянию, а не применять изменение ещё раз.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('notes.jobs')
+
+_tasks = {}
+
+
+def task(name):
+    """Регистрирует функцию как задачу с именем name."""
+    def register(func):
+        _tasks[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, key=None, using=None):
+    """Ставит задачу в очередь базы using.
+
+    Пока в очереди ждёт задача с тем же key, новая не добавляется.
+    При NOTES_JOBS_EAGER задача выполняется сразу (для тестов).
+    """
+    payload = payload or {}
+    if settings.NOTES_JOBS_EAGER:
+        _tasks[name](**payload)
+        return
+    using = using or router.db_for_write(Job)
+    Job.objects.using(using).bulk_create(
+        [Job(name=name, payload=payload, key=key)], ignore_conflicts=True
+    )
+
+
+class Worker:
+    """Выполняет задачи из очереди одной базы."""
+
+    def __init__(self, using, batch_size=10):
+        self.using = using
+        self.batch_size = batch_size
+        self.lease = timedelta(seconds=settings.NOTES_JOBS_LEASE)
+        self.max_attempts = settings.NOTES_JOBS_MAX_ATTEMPTS
+        self.retry_delay = settings.NOTES_JOBS_RETRY_DELAY
+
+    def claim(self):
+        """Захватывает готовые задачи и возвращает их."""
+        jobs = Job.objects.using(self.using)
+        now = timezone.now()
+        ready = (
+            Q(status=Job.PENDING, run_at__lte=now)
+            | Q(status=Job.RUNNING, locked_until__lt=now)
+        )
+        candidates = list(
+            jobs.filter(ready).order_by('run_at', 'id')
+            .values_list('id', flat=True)[:self.batch_size]
+        )
+        claimed = [
+            pk for pk in candidates
+            if jobs.filter(ready, pk=pk).update(
+                status=Job.RUNNING,
+                locked_until=now + self.lease,
+                attempts=F('attempts') + 1,
+            )
+        ]
+        return list(jobs.filter(pk__in=claimed).order_by('run_at', 'id'))
+
+    def execute(self, job):
+        jobs = Job.objects.using(self.using)
+        # Аренда могла истечь, и задачу забрал другой исполнитель:
+        # тогда её строку он и обновит.
+        mine = jobs.filter(
+            pk=job.pk, status=Job.RUNNING, attempts=job.attempts
+        )
+        try:
+            _tasks[job.name](**job.payload)
+        except Exception:
+            logger.exception('Задача %s #%s упала', job.name, job.pk)
+            if job.attempts >= self.max_attempts:
+                mine.update(
+                    status=Job.FAILED, last_error=traceback.format_exc()
+                )
+            else:
+                self.retry(mine, job)
+            return False
+        mine.delete()
+        return True
+
+    def retry(self, mine, job):
+        """Возвращает упавшую задачу в очередь с задержкой."""
+        delay = self.retry_delay * 2 ** (job.attempts - 1)
+        try:
+            with transaction.atomic(using=self.using):
+                mine.update(
+                    status=Job.PENDING,
+                    run_at=timezone.now() + timedelta(seconds=delay),
+                    last_error=traceback.format_exc(),
+                )
+        except IntegrityError:
+            # Пока задача выполнялась, enqueue() поставил в очередь
+            # задачу с тем же key - повтор выполнит она.
+            mine.delete()
+
+    def run_once(self):
+        """Выполняет одну пачку задач; возвращает число захваченных."""
+        jobs = self.claim()
+        for job in jobs:
+            self.execute(job)
+        return len(jobs)
+
+
+def work(databases, poll_interval=1.0, once=False):
+    """Цикл исполнителя по очередям баз databases.
+
+    Пока задачи есть, пачки берутся без пауз; когда очереди пусты,
+    исполнитель ждёт poll_interval секунд или, при once, завершается.
+    Возвращает число захваченных задач.
+    """
+    workers = [Worker(alias) for alias in databases]
+    total = 0
+    while True:
+        claimed = sum(worker.run_once() for worker in workers)
+        total += claimed
+        if not claimed:
+            if once:
+                return total
+            time.sleep(poll_interval)
+
+
+def _work_in_process(databases, poll_interval, once):
+    # Подключения родителя после fork использовать нельзя.
+    connections.close_all()
+    try:
+        work(databases, poll_interval, once)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_workers(databases, workers=1, poll_interval=1.0, once=False):
+    """Запускает workers процессов-исполнителей и ждёт их завершения."""
+    if workers <= 1:
+        return work(databases, poll_interval, once)
+    connections.close_all()
+    context = get_context('fork')
+    processes = [
+        context.Process(
+            target=_work_in_process, args=(databases, poll_interval, once)
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notes.models import NoteRevision
+from notes.revisions import compact_revisions
+from notes.routers import note_databases
+
+
+class Command(BaseCommand):
+    help = (
+        'Прореживает историю правок старше --days дней (остаётся '
+        'последняя ревизия за день) и перестраивает цепочки дельт.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.NOTES_REVISION_KEEP_DAYS
+        )
+
+    def handle(self, *args, days, **options):
+        before = timezone.now() - timedelta(days=days)
+        removed = size_before = size_after = 0
+        for using in note_databases():
+            note_ids = (
+                NoteRevision.objects.using(using)
+                .filter(created_at__lt=before)
+                .values_list('note_id', flat=True)
+                .distinct()
+            )
+            for note_id in list(note_ids):
+                result = compact_revisions(note_id, using, before)
+                removed += result[0]
+                size_before += result[1]
+                size_after += result[2]
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено ревизий: {removed}, объём истории '
+            f'{size_before} -> {size_after} байт.'
+        ))
@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.benchmarks import (compare, format_table, isolated_databases,
+                              load_baseline, measure, save_baseline)
+from notes.benchmarks.routes import RouteBenchmark
+
+
+def checked(action):
+    """Прерывает замер, если маршрут вернул ошибку."""
+    def wrapper(**kwargs):
+        response = action(**kwargs)
+        if response.status_code >= HTTPStatus.BAD_REQUEST:
+            raise CommandError(
+                f'{response.request["PATH_INFO"]}: '
+                f'код ответа {response.status_code}'
+            )
+        return response
+    return wrapper
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки, число запросов и память для всех маршрутов '
+        'на отдельной тестовой базе и сравнивает с базовой линией.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=10)
+        parser.add_argument('--notes', type=int, default=1000)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--routes', nargs='*', help='Замерять только эти маршруты.'
+        )
+        parser.add_argument('--baseline', help='JSON с базовой линией.')
+        parser.add_argument(
+            '--save-baseline', help='Сохранить результаты как базовую линию.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p95 (0.2 = 20%%).',
+        )
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        dataset = {'authors': options['authors'], 'notes': options['notes']}
+        self.stderr.write(
+            f"Заполнение базы: {dataset['authors']} авторов, "
+            f"{dataset['notes']} заметок..."
+        )
+        with isolated_databases(keepdb=options['keepdb']):
+            benchmark = RouteBenchmark(**dataset)
+            results = {}
+            for name, (action, prepare) in benchmark.scenarios().items():
+                if options['routes'] and name not in options['routes']:
+                    continue
+                results[name] = measure(
+                    checked(action),
+                    options['iterations'],
+                    warmup=options['warmup'],
+                    prepare=prepare,
+                )
+        self.stdout.write(format_table(results))
+        report = {'dataset': dataset, 'routes': results}
+        if options['save_baseline']:
+            save_baseline(options['save_baseline'], report)
+        if options['baseline']:
+            baseline = load_baseline(options['baseline'])
+            if baseline['dataset'] != dataset:
+                self.stderr.write(self.style.WARNING(
+                    'Базовая линия снята на другом наборе данных: '
+                    f"{baseline['dataset']}."
+                ))
+            regressions = compare(
+                results, baseline['routes'], options['tolerance']
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий не найдено.'))
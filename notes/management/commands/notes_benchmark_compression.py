@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from notes.benchmarks import isolated_databases
+from notes.benchmarks.compression import CompressionBenchmark, format_table
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет размер страниц notes и время их сжатия gzip и brotli '
+        'на каждом уровне.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, iterations, **options):
+        with isolated_databases():
+            results = CompressionBenchmark().run(iterations)
+        self.stdout.write(format_table(results))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from notes.benchmarks import isolated_databases
+from notes.benchmarks.concurrency import ConcurrencyBenchmark, format_table
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает асинхронный JSON API и HTML-страницы под WSGI '
+        'при одновременных запросах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 8, 32]
+        )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Запросов на каждого одновременного клиента.',
+        )
+
+    def handle(self, *args, concurrency, requests, **options):
+        with isolated_databases():
+            results = ConcurrencyBenchmark().run(concurrency, requests)
+        self.stdout.write(format_table(results))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from notes.benchmarks.events import EventsBenchmark, format_table
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет память простаивающих соединений потока событий '
+        'и время доставки события всем вкладкам автора.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--connections', type=int, nargs='+',
+            default=[1000, 5000, 10000],
+        )
+        parser.add_argument('--authors', type=int, default=100)
+        parser.add_argument('--publishes', type=int, default=50)
+
+    def handle(self, *args, connections, authors, publishes, **options):
+        rows = [
+            EventsBenchmark(count, authors).run(publishes)
+            for count in connections
+        ]
+        self.stdout.write(format_table(rows))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from notes.benchmarks import isolated_databases
+from notes.benchmarks.templates import TemplateBenchmark, format_table
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет отрисовку list.html, detail.html и form.html без кеша '
+        'шаблонов и шапки и с ними.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+
+    def handle(self, *args, iterations, warmup, **options):
+        with isolated_databases():
+            results = TemplateBenchmark().run(iterations, warmup=warmup)
+        self.stdout.write(format_table(results))
@@ -0,0 +1,56 @@
+import itertools
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.exchange import FORMATS, RecordWriter, guess_format
+from notes.fields import decode_text
+from notes.models import Note
+from notes.routers import note_databases
+
+
+class Command(BaseCommand):
+    help = 'Потоковый экспорт заметок в JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-', help="Файл или '-' для stdout."
+        )
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--author', help='Только заметки автора.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, path, format, author, chunk_size, **options):
+        fmt = format or guess_format(path)
+        rows = itertools.chain.from_iterable(
+            self.rows(using, author, chunk_size) for using in note_databases()
+        )
+        if path == '-':
+            exported = self.export(self.stdout, fmt, rows)
+        else:
+            try:
+                with open(path, 'w', encoding='utf-8', newline='') as stream:
+                    exported = self.export(stream, fmt, rows)
+            except OSError as error:
+                raise CommandError(error)
+        self.stderr.write(f'Экспортировано заметок: {exported}.')
+
+    def rows(self, using, author, chunk_size):
+        notes = Note.objects.using(using).order_by('pk')
+        if author:
+            notes = notes.filter(author__username=author)
+        return notes.values_list(
+            'title', 'text', 'slug', 'author__username'
+        ).iterator(chunk_size=chunk_size)
+
+    def export(self, stream, fmt, rows):
+        writer = RecordWriter(stream, fmt)
+        exported = 0
+        for title, text, slug, author in rows:
+            writer.write({
+                'title': title,
+                'text': decode_text(text),
+                'slug': slug,
+                'author': author,
+            })
+            exported += 1
+        return exported
@@ -0,0 +1,92 @@
+import sys
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from notes.bulk import bulk_create_notes, group_by_database
+from notes.exchange import FORMATS, guess_format, read_records
+from notes.models import Note
+from notes.slugs import SLUG_MAX_LENGTH, allocate_slugs, base_slug
+
+User = get_user_model()
+
+DEFAULT_TITLE = Note._meta.get_field('title').get_default()
+TITLE_MAX_LENGTH = Note._meta.get_field('title').max_length
+
+
+class Command(BaseCommand):
+    help = 'Потоковый импорт заметок из JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл или '-' для stdin.")
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, path, format, batch_size, **options):
+        fmt = format or guess_format(path)
+        self.authors = {}
+        self.imported = self.skipped = 0
+        if path == '-':
+            self.import_stream(sys.stdin, fmt, batch_size)
+        else:
+            try:
+                with open(path, encoding='utf-8', newline='') as stream:
+                    self.import_stream(stream, fmt, batch_size)
+            except OSError as error:
+                raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано заметок: {self.imported}, '
+            f'пропущено: {self.skipped}.'
+        ))
+
+    def import_stream(self, stream, fmt, batch_size):
+        records = read_records(stream, fmt)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+
+    def resolve_authors(self, usernames):
+        """Подгружает id авторов, которых ещё нет в словаре."""
+        missing = set(usernames) - self.authors.keys()
+        if missing:
+            self.authors.update(
+                User.objects.filter(username__in=missing)
+                .values_list('username', 'pk')
+            )
+            # Неизвестные авторы запоминаются, чтобы не искать их снова.
+            self.authors.update(
+                (username, None)
+                for username in missing - self.authors.keys()
+            )
+
+    def import_batch(self, batch):
+        self.resolve_authors(record.get('author') for record in batch)
+        notes = []
+        for record in batch:
+            author_id = self.authors.get(record.get('author'))
+            if author_id is None or not record.get('text'):
+                self.skipped += 1
+                continue
+            title = record.get('title') or DEFAULT_TITLE
+            slug = record.get('slug') or base_slug(title)
+            notes.append(Note(
+                title=title[:TITLE_MAX_LENGTH],
+                text=record['text'],
+                slug=slug[:SLUG_MAX_LENGTH],
+                author_id=author_id,
+            ))
+        if not notes:
+            return
+        for using, group in group_by_database(notes).items():
+            with transaction.atomic(using=using):
+                slugs = allocate_slugs(
+                    Note.objects.using(using), [note.slug for note in group]
+                )
+                for note, slug in zip(group, slugs):
+                    note.slug = slug
+                bulk_create_notes(group, using=using)
+        self.imported += len(notes)
@@ -0,0 +1,43 @@
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notes.benchmarks.writes import WriteStress
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает параллельных писателей на временных базах SQLite '
+        'с разными профилями и сравнивает долю ошибок блокировки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', nargs='*',
+            default=['default', *settings.DATABASE_PROFILES],
+            help="Профили из DATABASE_PROFILES; 'default' - без настроек.",
+        )
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--operations', type=int, default=200)
+
+    def handle(self, *args, profiles, writers, operations, **options):
+        self.stdout.write(
+            f"{'профиль':<14}{'операций':>10}{'ошибок':>8}{'доля':>8}"
+            f"{'опер./с':>10}{'p95, мс':>10}"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in profiles:
+                stress = WriteStress(
+                    Path(directory) / f'{profile}.sqlite3', profile
+                )
+                try:
+                    result = stress.run(writers, operations)
+                finally:
+                    stress.close()
+                self.stdout.write(
+                    f"{profile:<14}{result['operations']:>10}"
+                    f"{result['errors']:>8}{result['error_rate']:>8.2%}"
+                    f"{result['ops_per_s']:>10}{result['p95_ms']:>10.1f}"
+                )
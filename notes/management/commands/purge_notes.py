@@ -0,0 +1,44 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notes.bulk import purge_notes
+from notes.routers import note_databases
+
+
+class Command(BaseCommand):
+    help = (
+        'Окончательно удаляет заметки, удалённые больше --days дней '
+        'назад, небольшими пачками с паузами между ними.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.NOTES_PURGE_AFTER_DAYS
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.NOTES_PURGE_BATCH_SIZE,
+            help='Сколько заметок удалять одной транзакцией.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=settings.NOTES_PURGE_PAUSE,
+            help='Пауза в секундах между пачками, чтобы не держать '
+                 'блокировку записи подряд.',
+        )
+
+    def handle(self, *args, days, batch_size, pause, **options):
+        before = timezone.now() - timedelta(days=days)
+        purged = 0
+        for using in note_databases():
+            while True:
+                deleted = purge_notes(before, using, batch_size)
+                purged += deleted
+                if deleted < batch_size:
+                    break
+                time.sleep(pause)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено заметок: {purged}.'
+        ))
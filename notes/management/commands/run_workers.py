@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from notes.jobs import run_workers
+from notes.routers import note_databases
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди Job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Число процессов-исполнителей.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и завершиться.',
+        )
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='Очередь какой базы обслуживать; по умолчанию всех баз '
+                 'с заметками.',
+        )
+
+    def handle(self, *args, workers, poll_interval, once, databases,
+               **options):
+        databases = databases or note_databases()
+        try:
+            processed = run_workers(databases, workers, poll_interval, once)
+        except KeyboardInterrupt:
+            return
+        if once and workers <= 1:
+            self.stdout.write(self.style.SUCCESS(
+                f'Выполнено задач: {processed}.'
+            ))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notes.seeding import create_authors, seed_notes
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу пользователями и заметками с правдоподобными '
+        'длинами текстов и пересекающимися slug для нагрузочных тестов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--notes', type=int, default=10_000)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число процессов, наполняющих и записывающих пачки.',
+        )
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, users, notes, batch_size, workers, prefix, seed,
+               **options):
+        started = time.perf_counter()
+        author_ids = create_authors(users, prefix=prefix)
+        seed_notes(
+            author_ids, notes,
+            batch_size=batch_size, seed=seed, workers=workers,
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {len(author_ids)} пользователей и {notes} заметок '
+            f'за {elapsed:.1f} с ({notes / elapsed:.0f} заметок/с).'
+        ))
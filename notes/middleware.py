@@ -0,0 +1,329 @@
+import asyncio
+import functools
+import json
+import logging
+import re
+import time
+import zlib
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+import brotli
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+logger = logging.getLogger('notes.metrics')
+
+# Счётчик запросов текущего HTTP-запроса: по нему код, выполняемый
+# в других потоках (см. track_queries), попадает в те же метрики.
+current_collector = ContextVar('notes_query_collector', default=None)
+
+
+class QueryCollector:
+    """Считает запросы к базе и время их выполнения."""
+
+    def __init__(self, track_statements=False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter() if track_statements else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            if self.statements is not None:
+                self.statements[sql] += 1
+
+
+@contextmanager
+def collect_queries(collector):
+    """Передаёт в collector запросы текущего потока ко всем базам."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(collector))
+        yield collector
+
+
+def track_queries(func):
+    """Учитывает запросы func в метриках HTTP-запроса.
+
+    У каждого потока свои соединения с базой, поэтому функции, которые
+    async-представления выполняют в пуле потоков, оборачиваются этим
+    декоратором.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        collector = current_collector.get()
+        if collector is None:
+            return func(*args, **kwargs)
+        with collect_queries(collector):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class AsyncCapableMiddleware:
+    """Middleware, которое работает и под WSGI, и под ASGI.
+
+    Если за ним в цепочке async-обработчик, вызов идёт через
+    __acall__ и Django не переключается в поток ради синхронного кода.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Так Django узнаёт, что экземпляр - корутинная функция.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process(request, await self.get_response(request))
+
+    def process(self, request, response):
+        return response
+
+
+class RequestMetricsMiddleware(AsyncCapableMiddleware):
+    """Замеряет запросы к базе, отрисовку шаблона и общее время ответа.
+
+    Результат отдаётся в заголовке Server-Timing и пишется в лог
+    notes.metrics одной JSON-строкой на запрос. Если задан
+    NOTES_METRICS_N_PLUS_ONE_THRESHOLD, одинаковые SQL-запросы,
+    повторённые не меньше указанного числа раз, попадают в лог
+    как предупреждение о проблеме N+1.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.n_plus_one_threshold = (
+            settings.NOTES_METRICS_N_PLUS_ONE_THRESHOLD
+        )
+
+    @contextmanager
+    def measure(self):
+        collector = QueryCollector(
+            track_statements=self.n_plus_one_threshold is not None
+        )
+        token = current_collector.set(collector)
+        try:
+            with collect_queries(collector):
+                yield collector
+        finally:
+            current_collector.reset(token)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with self.measure() as collector:
+            response = self.get_response(request)
+        return self.report(request, response, collector, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with self.measure() as collector:
+            response = await self.get_response(request)
+        return self.report(request, response, collector, started)
+
+    def report(self, request, response, collector, started):
+        total = time.perf_counter() - started
+        render = getattr(request, 'template_render_time', None)
+
+        timings = [
+            f'db;dur={collector.duration * 1000:.2f};'
+            f'desc="{collector.count} queries"',
+            f'total;dur={total * 1000:.2f}',
+        ]
+        if render is not None:
+            timings.insert(1, f'tpl;dur={render * 1000:.2f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': collector.count,
+            'db_ms': round(collector.duration * 1000, 2),
+            'template_ms': (
+                round(render * 1000, 2) if render is not None else None
+            ),
+            'total_ms': round(total * 1000, 2),
+            'cache': response.get('X-Cache'),
+        }))
+        if collector.statements is not None:
+            self.report_repeated(request, collector.statements)
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request.template_render_time = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def report_repeated(self, request, statements):
+        for sql, count in statements.items():
+            if count >= self.n_plus_one_threshold:
+                logger.warning(json.dumps({
+                    'problem': 'n+1',
+                    'path': request.path,
+                    'count': count,
+                    'sql': sql,
+                }, ensure_ascii=False))
+
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml)|image/svg\+xml)'
+)
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, которые клиент не запретил (q=0)."""
+    encodings = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+def gzip_compressor(level):
+    return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class BrotliCompressor:
+    """Обёртка над brotli.Compressor с интерфейсом zlib."""
+
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self, mode=None):
+        if mode == zlib.Z_SYNC_FLUSH:
+            return self.compressor.flush()
+        return self.compressor.finish()
+
+
+COMPRESSORS = {
+    'br': (BrotliCompressor, 'NOTES_COMPRESS_BROTLI_LEVEL'),
+    'gzip': (gzip_compressor, 'NOTES_COMPRESS_GZIP_LEVEL'),
+}
+
+# Суффикс, который сжатие добавляет к ETag: "...-br" или "...-gzip".
+ETAG_SUFFIX_RE = re.compile(
+    '-(?:{})"'.format('|'.join(map(re.escape, COMPRESSORS)))
+)
+CONDITIONAL_HEADERS = ('HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH')
+
+
+def compress(content, encoding, level):
+    compressor = COMPRESSORS[encoding][0](level)
+    return compressor.compress(content) + compressor.flush()
+
+
+def compress_stream(chunks, encoding, level):
+    """Сжимает поток по частям, не собирая ответ целиком.
+
+    После каждой части буфер сбрасывается, чтобы клиент получал
+    данные сразу, а не в конце ответа.
+    """
+    compressor = COMPRESSORS[encoding][0](level)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware(AsyncCapableMiddleware):
+    """Сжимает ответы brotli или gzip - что выберет клиент.
+
+    Brotli предпочтительнее: при той же нагрузке на процессор он
+    сжимает текст сильнее. Ответы короче NOTES_COMPRESS_MIN_SIZE
+    байт, уже сжатые (например, статика WhiteNoise) и несжимаемые
+    типы отдаются как есть. Потоковые ответы сжимаются по частям.
+    Уровни сжатия задаются NOTES_COMPRESS_BROTLI_LEVEL и
+    NOTES_COMPRESS_GZIP_LEVEL, см. notes_benchmark_compression.
+
+    ETag сжатого ответа остаётся сильным, но получает суффикс
+    кодирования: сжатое и несжатое тела различаются побайтно.
+    В If-Match и If-None-Match запроса суффикс отрезается до вызова
+    представления, поэтому и 304, и проверка If-Match при
+    редактировании заметки работают со сжатыми страницами.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = settings.NOTES_COMPRESS_MIN_SIZE
+        self.levels = {
+            encoding: getattr(settings, setting)
+            for encoding, (_, setting) in COMPRESSORS.items()
+        }
+
+    def __call__(self, request):
+        for header in CONDITIONAL_HEADERS:
+            if header in request.META:
+                request.META[header] = ETAG_SUFFIX_RE.sub(
+                    '"', request.META[header]
+                )
+        return super().__call__(request)
+
+    def process(self, request, response):
+        if (
+            response.has_header('Content-Encoding')
+            or not COMPRESSIBLE_TYPES.match(response.get('Content-Type', ''))
+        ):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        # Ответ зависит от Accept-Encoding, даже если сжимать не будем.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding = next(
+            (name for name in COMPRESSORS if name in accepted), None
+        )
+        if encoding is None:
+            return response
+        level = self.levels[encoding]
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding, level
+            )
+            # Длина потока заранее неизвестна.
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.endswith('"'):
+            response['ETag'] = f'{etag[:-1]}-{encoding}"'
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,96 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:07
+
+import itertools
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fts5_available(schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_fts_table(apps, schema_editor):
+    """Создаёт таблицу FTS5 и заполняет её существующими заметками."""
+    if not fts5_available(schema_editor):
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE notes_note_fts USING fts5("
+        "title, text, author_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        'INSERT INTO notes_note_fts (rowid, title, text, author_id) '
+        'SELECT id, title, text, author_id FROM notes_note'
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if fts5_available(schema_editor):
+        schema_editor.execute('DROP TABLE IF EXISTS notes_note_fts')
+
+
+# Копия разбиения на слова из notes.search: миграция не должна
+# зависеть от текущего кода приложения.
+TOKEN_RE = re.compile(r'\w+')
+TERM_MAX_LENGTH = 64
+BATCH_SIZE = 500
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_RE.findall(text or '')]
+
+
+def fill_term_index(apps, schema_editor):
+    """Заполняет переносимый индекс, если FTS5 недоступен."""
+    if fts5_available(schema_editor):
+        return
+    Note = apps.get_model('notes', 'Note')
+    NoteTerm = apps.get_model('notes', 'NoteTerm')
+    db_alias = schema_editor.connection.alias
+    notes = Note.objects.using(db_alias).values_list('id', 'title', 'text')
+    terms = (
+        NoteTerm(note_id=pk, term=term[:TERM_MAX_LENGTH],
+                 weight=min(weight, 32767))
+        for pk, title, text in notes.iterator()
+        for term, weight in Counter(
+            tokenize(title) * 2 + tokenize(text)
+        ).items()
+    )
+    while True:
+        batch = list(itertools.islice(terms, BATCH_SIZE))
+        if not batch:
+            break
+        NoteTerm.objects.using(db_alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='notes.note')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='noteterm',
+            index=models.Index(fields=['term', 'note'], name='noteterm_term_idx'),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(fill_term_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:12
+
+from django.db import migrations
+import notes.fields
+
+BATCH_SIZE = 500
+
+
+def encode_texts(apps, schema_editor):
+    """Перезаписывает тексты в новом формате, сжимая большие."""
+    Note = apps.get_model('notes', 'Note')
+    notes = Note.objects.using(schema_editor.connection.alias).only('text')
+    last_pk = 0
+    while True:
+        batch = list(notes.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            break
+        notes.bulk_update(batch, ('text',))
+        last_pk = batch[-1].pk
+
+
+def decode_texts(apps, schema_editor):
+    """Возвращает тексты к обычным строкам перед откатом поля."""
+    Note = apps.get_model('notes', 'Note')
+    notes = Note.objects.using(schema_editor.connection.alias).only('text')
+    with schema_editor.connection.cursor() as cursor:
+        for note in notes.iterator():
+            cursor.execute(
+                'UPDATE notes_note SET text = %s WHERE id = %s',
+                (note.text, note.pk),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.fields.CompressedTextField(help_text='Добавьте подробностей', verbose_name='Текст'),
+        ),
+        migrations.RunPython(encode_texts, decode_texts),
+    ]
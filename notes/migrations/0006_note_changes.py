@@ -0,0 +1,27 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author_id', models.BigIntegerField(verbose_name='Автор')),
+                ('note_id', models.BigIntegerField(verbose_name='Заметка')),
+                ('slug', models.SlugField(max_length=100)),
+                ('deleted', models.BooleanField(default=False, verbose_name='Удалена')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notechange',
+            index=models.Index(fields=['author_id', 'id'], name='notechange_author_seq_idx'),
+        ),
+    ]
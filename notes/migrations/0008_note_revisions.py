@@ -0,0 +1,32 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер')),
+                ('base_number', models.PositiveIntegerField(verbose_name='Номер снимка')),
+                ('title', models.CharField(max_length=100, verbose_name='Заголовок')),
+                ('data', models.BinaryField(verbose_name='Снимок или дельта')),
+                ('chain_size', models.PositiveIntegerField(default=0, verbose_name='Байт в цепочке после снимка')),
+                ('digest', models.CharField(max_length=40, verbose_name='SHA-1 текста')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='notes.note')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='noterevision',
+            constraint=models.UniqueConstraint(fields=('note', 'number'), name='noterevision_note_number_unique'),
+        ),
+    ]
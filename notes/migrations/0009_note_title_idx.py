@@ -0,0 +1,17 @@
+# Generated by Django 3.2.15 on 2026-10-18 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0008_note_revisions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['title'], name='note_title_idx'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+from django.db import migrations, models
+
+from notes.fields import decode_text
+
+FTS_COLUMNS = {
+    'forward': ('author', "title, text, author, "),
+    'backward': ('author_id', "title, text, author_id UNINDEXED, "),
+}
+
+
+def fts5_available(schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def rebuild_fts_table(apps, schema_editor, direction):
+    """Пересоздаёт таблицу FTS5 и заполняет её неудалёнными заметками.
+
+    Длинные тексты хранятся сжатыми, а values_list() их не
+    распаковывает - это делает decode_text().
+    """
+    if not fts5_available(schema_editor):
+        return
+    author_column, columns = FTS_COLUMNS[direction]
+    schema_editor.execute('DROP TABLE IF EXISTS notes_note_fts')
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE notes_note_fts USING fts5('
+        f"{columns}tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    Note = apps.get_model('notes', 'Note')
+    notes = (
+        Note.objects.using(schema_editor.connection.alias)
+        .filter(deleted_at__isnull=True)
+        .values_list('id', 'title', 'text', 'author_id')
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO notes_note_fts '
+            f'(rowid, title, text, {author_column}) VALUES (%s, %s, %s, %s)',
+            (
+                (pk, title, decode_text(text), str(author_id))
+                for pk, title, text, author_id in notes.iterator()
+            ),
+        )
+
+
+def forward_fts(apps, schema_editor):
+    rebuild_fts_table(apps, schema_editor, 'forward')
+
+
+def backward_fts(apps, schema_editor):
+    rebuild_fts_table(apps, schema_editor, 'backward')
+
+
+def fill_term_authors(apps, schema_editor):
+    NoteTerm = apps.get_model('notes', 'NoteTerm')
+    Note = apps.get_model('notes', 'Note')
+    NoteTerm.objects.using(schema_editor.connection.alias).update(
+        author_id=models.Subquery(
+            Note.objects.filter(pk=models.OuterRef('note_id'))
+            .values('author_id')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0010_note_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='noteterm',
+            name='author_id',
+            field=models.BigIntegerField(default=0, verbose_name='Автор'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_term_authors, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='noteterm',
+            name='noteterm_term_idx',
+        ),
+        migrations.AddIndex(
+            model_name='noteterm',
+            index=models.Index(fields=['term', 'author_id', 'note'], name='noteterm_term_author_idx'),
+        ),
+        migrations.RunPython(forward_fts, backward_fts),
+    ]
@@ -1,7 +1,35 @@
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, router, transaction
+from django.utils import timezone
 
-from pytils.translit import slugify
+from .fields import CompressedTextField
+from .slugs import SLUG_MAX_LENGTH, WARNING, allocate_slug, base_slug
+
+# Сколько раз подбирать slug заново, если его заняли параллельно.
+SLUG_ATTEMPTS = 5
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def for_author(self, author):
+        """Заметки автора из базы, которую роутер выбрал для него.
+
+        При шардировании запрос уходит только в шард автора.
+        """
+        queryset = self
+        if self._db is None:
+            queryset = self.using(
+                router.db_for_read(self.model, author_id=author.pk)
+            )
+        return queryset.filter(author=author)
+
+
+class LiveNoteManager(models.Manager.from_queryset(NoteQuerySet)):
+    """Заметки, которые не удалены."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 
 class Note(models.Model):
@@ -11,14 +39,15 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
     slug = models.SlugField(
         'Адрес для страницы с заметкой',
-        max_length=100,
-        unique=True,
+        max_length=SLUG_MAX_LENGTH,
+        # Уникальность среди неудалённых заметок - note_slug_live_unique.
+        db_index=False,
         blank=True,
         help_text=('Укажите адрес для страницы заметки. Используйте только '
                    'латиницу, цифры, дефисы и знаки подчёркивания')
@@ -27,12 +56,237 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    created_at = models.DateTimeField(
+        'Создана',
+        auto_now_add=True,
+        db_index=True,
+    )
+    updated_at = models.DateTimeField(
+        'Изменена',
+        auto_now=True,
+        db_index=True,
+    )
+    deleted_at = models.DateTimeField('Удалена', null=True, blank=True)
+
+    # Удалённые заметки не видны ни страницам, ни проверке slug;
+    # их окончательно удаляет manage.py purge_notes.
+    objects = LiveNoteManager()
+    all_objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'id'),
+                name='note_author_id_idx',
+            ),
+            models.Index(fields=('title',), name='note_title_idx'),
+            models.Index(
+                fields=('deleted_at',),
+                name='note_deleted_at_idx',
+                condition=models.Q(deleted_at__isnull=False),
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('slug',),
+                name='note_slug_live_unique',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Состояние до правки - основа дельты следующей ревизии
+        # (см. notes.revisions). Текст хранится нераспакованным.
+        instance._loaded = (
+            instance.__dict__.get('title'), instance.__dict__.get('text')
+        )
+        return instance
+
+    def unique_error_message(self, model_class, unique_check):
+        if unique_check == ('slug',):
+            return ValidationError(self.slug + WARNING, code='unique')
+        return super().unique_error_message(model_class, unique_check)
+
+    def validate_unique(self, exclude=None):
+        """Проверяет и note_slug_live_unique.
+
+        Ограничения с условием Django 3.2 при проверке модели
+        пропускает.
+        """
+        super().validate_unique(exclude)
+        if not self.slug or (exclude and 'slug' in exclude):
+            return
+        others = type(self)._default_manager.using(
+            router.db_for_write(type(self), instance=self)
+        ).filter(slug=self.slug)
+        if self.pk is not None:
+            others = others.exclude(pk=self.pk)
+        if others.exists():
+            raise ValidationError({
+                'slug': [self.unique_error_message(type(self), ('slug',))]
+            })
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        others = type(self)._default_manager.using(using)
+        if self.pk is not None:
+            others = others.exclude(pk=self.pk)
+        base = base_slug(self.title)
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            self.slug = allocate_slug(others, base)
+            try:
+                with transaction.atomic(using=using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Slug успели занять между подбором и вставкой -
+                # подбираем следующий. Другие ошибки пробрасываем.
+                if (attempt == SLUG_ATTEMPTS
+                        or not others.filter(slug=self.slug).exists()):
+                    raise
+
+
+class NoteTerm(models.Model):
+    """Слово из заметки для переносимого полнотекстового поиска.
+
+    Используется только на СУБД без FTS5, см. notes.search.
+    """
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name='terms',
+    )
+    # Копия Note.author_id: поиск идёт по индексу (слово, автор)
+    # и не перебирает заметки других авторов с тем же словом.
+    author_id = models.BigIntegerField('Автор')
+    term = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('term', 'author_id', 'note'),
+                name='noteterm_term_author_idx',
+            ),
+        )
+
+
+class NoteChange(models.Model):
+    """Запись журнала изменений заметок для синхронизации клиентов.
+
+    Номер записи (id) служит монотонной последовательностью: клиент
+    запоминает последний полученный номер и запрашивает только то, что
+    изменилось после него. Удаления хранятся как надгробия (deleted).
+    Автор хранится числом, а не внешним ключом, чтобы надгробия
+    пережили каскадное удаление заметок вместе с пользователем.
+    """
+    author_id = models.BigIntegerField('Автор')
+    note_id = models.BigIntegerField('Заметка')
+    slug = models.SlugField(max_length=SLUG_MAX_LENGTH)
+    deleted = models.BooleanField('Удалена', default=False)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author_id', 'id'),
+                name='notechange_author_seq_idx',
+            ),
+        )
+
+
+class NoteRevision(models.Model):
+    """Состояние заметки после одного из сохранений.
+
+    Ревизия - либо снимок всего текста (number == base_number), либо
+    дельта к предыдущей ревизии той же заметки. Цепочка от снимка до
+    любой ревизии ограничена, см. notes.revisions.
+    """
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField('Номер')
+    base_number = models.PositiveIntegerField('Номер снимка')
+    title = models.CharField('Заголовок', max_length=100)
+    data = models.BinaryField('Снимок или дельта')
+    chain_size = models.PositiveIntegerField(
+        'Байт в цепочке после снимка', default=0
+    )
+    digest = models.CharField('SHA-1 текста', max_length=40)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'number'),
+                name='noterevision_note_number_unique',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.note_id}#{self.number}'
+
+    @property
+    def is_snapshot(self):
+        return self.number == self.base_number
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди notes.jobs.
+
+    Выполненные задачи удаляются, неудачные после всех попыток
+    остаются со статусом failed и текстом последней ошибки. Среди
+    ожидающих задач ключ уникален: повторная постановка задачи
+    с тем же ключом ничего не добавляет.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=100)
+    payload = models.JSONField('Аргументы', default=dict)
+    key = models.CharField(
+        'Ключ идемпотентности', max_length=200, null=True, blank=True
+    )
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    locked_until = models.DateTimeField(
+        'Занята до', null=True, blank=True
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'),
+                name='job_status_run_at_idx',
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('key',),
+                condition=models.Q(status='pending'),
+                name='job_pending_key_unique',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
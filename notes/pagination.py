@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Max
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+class KeysetPage:
+    """Страница выборки, полученная переходом по курсору."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Постраничный вывод без OFFSET.
+
+    Вместо номера страницы используется курсор - значение ключа
+    последней (или первой) показанной записи. Запрос всегда начинается
+    с поиска по индексу, поэтому время ответа не зависит от того,
+    насколько далеко пользователь пролистал список.
+    """
+
+    def __init__(self, queryset, per_page, key='id'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.key = key
+
+    def _parse_cursor(self, value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise Http404('Некорректный курсор страницы.')
+
+    def page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед before."""
+        limit = self.per_page + 1
+        if before is not None:
+            before = self._parse_cursor(before)
+            rows = list(
+                self.queryset
+                .filter(**{f'{self.key}__lt': before})
+                .order_by(f'-{self.key}')[:limit]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self.queryset.order_by(self.key)
+            if after is not None:
+                after = self._parse_cursor(after)
+                queryset = queryset.filter(**{f'{self.key}__gt': after})
+            rows = list(queryset[:limit])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = after is not None
+        if not rows:
+            # Курсор указывает за пределы выборки (например, записи
+            # удалены) - оставляем ссылку, чтобы вернуться назад.
+            return KeysetPage(
+                rows,
+                next_cursor=before - 1 if before is not None else None,
+                previous_cursor=after + 1 if after is not None else None,
+            )
+        return KeysetPage(
+            rows,
+            next_cursor=getattr(rows[-1], self.key) if has_next else None,
+            previous_cursor=(
+                getattr(rows[0], self.key) if has_previous else None
+            ),
+        )
+
+
+def table_estimate(queryset):
+    """Примерное число строк в таблице модели по статистике СУБД.
+
+    Статистику обновляет ANALYZE; без неё берётся наибольший id,
+    который после удалений завышает число строк.
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    estimate = None
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE oid = %s::regclass',
+                    [table],
+                )
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    'SELECT table_rows FROM information_schema.tables '
+                    'WHERE table_schema = DATABASE() AND table_name = %s',
+                    [table],
+                )
+            else:
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                    [table],
+                )
+            row = cursor.fetchone()
+    except DatabaseError:
+        # У SQLite таблицы sqlite_stat1 нет, пока не было ANALYZE.
+        row = None
+    if row is not None and row[0] is not None:
+        estimate = int(str(row[0]).split()[0])
+    if estimate is None or estimate < 0:
+        estimate = queryset.aggregate(last=Max('pk'))['last'] or 0
+    return estimate
+
+
+def estimated_count(queryset, exact_limit=None):
+    """Число записей выборки без COUNT(*) по всей большой таблице.
+
+    Без фильтров, кроме условия менеджера по умолчанию, берётся
+    оценка по статистике таблицы, а если она меньше exact_limit -
+    точное число. Отфильтрованная выборка считается не дальше
+    exact_limit записей.
+    """
+    if exact_limit is None:
+        exact_limit = settings.NOTES_ADMIN_EXACT_COUNT_LIMIT
+    unfiltered = queryset.model._default_manager.all().query.where
+    if queryset.query.where != unfiltered:
+        return queryset.order_by()[:exact_limit].count()
+    estimate = table_estimate(queryset)
+    if estimate < exact_limit:
+        return queryset.count()
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, у которого count - оценка из estimated_count()."""
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
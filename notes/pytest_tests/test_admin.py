@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.admin import NoteAdmin
+from notes.bulk import soft_delete_notes
+from notes.models import Note, NoteChange
+from notes.pagination import estimated_count
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse('admin:notes_note_changelist')
+
+
+@pytest.fixture
+def notes(author):
+    other = get_user_model().objects.create(username='Другой')
+    return [
+        Note.objects.create(
+            title=f'Заметка {index}',
+            text='Текст',
+            slug=f'note-{index}',
+            author=author if index % 2 else other,
+        )
+        for index in range(5)
+    ]
+
+
+def changelist(admin_client, **params):
+    response = admin_client.get(URL, params)
+    assert response.status_code == HTTPStatus.OK
+    return [note.pk for note in response.context['cl'].result_list]
+
+
+def changelist_queries(admin_client):
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.get(URL)
+    assert response.status_code == HTTPStatus.OK
+    return [query['sql'] for query in context.captured_queries]
+
+
+def test_changelist_skips_full_count(admin_client, notes, author, settings):
+    settings.NOTES_ADMIN_EXACT_COUNT_LIMIT = 1
+    changelist_queries(admin_client)
+    sql = changelist_queries(admin_client)
+    assert not any('COUNT(*)' in query for query in sql)
+    assert any('JOIN "auth_user"' in query for query in sql)
+    # Авторы приходят тем же запросом: число запросов не растёт.
+    Note.objects.create(title='Ещё', text='Текст', author=author)
+    assert len(changelist_queries(admin_client)) == len(sql)
+
+
+def test_changelist_keyset_paging(admin_client, notes, monkeypatch):
+    monkeypatch.setattr(NoteAdmin, 'list_per_page', 2)
+    pks = sorted((note.pk for note in notes), reverse=True)
+    response = admin_client.get(URL)
+    assert response.context['cl'].next_url == f'?id__lt={pks[1]}'
+    assert changelist(admin_client) == pks[:2]
+    assert changelist(admin_client, id__lt=pks[1]) == pks[2:4]
+    assert changelist(admin_client, id__lt=pks[3]) == pks[4:]
+
+
+def test_changelist_search(admin_client, notes):
+    assert changelist(admin_client, q='note-3') == [notes[3].pk]
+    assert changelist(admin_client, q='Заметка 1') == [notes[1].pk]
+    assert changelist(admin_client, q='Заметка') == [
+        note.pk for note in reversed(notes)
+    ]
+
+
+def test_estimated_count(notes):
+    assert estimated_count(Note.objects.all(), exact_limit=100) == 5
+    # Оценка большой таблицы - без COUNT(*); здесь это наибольший id.
+    assert estimated_count(Note.objects.all(), exact_limit=1) == notes[-1].pk
+    # Отфильтрованная выборка считается до предела.
+    assert estimated_count(Note.objects.filter(pk__gt=0), exact_limit=3) == 3
+
+
+def test_changelist_deleted_filter(admin_client, notes):
+    soft_delete_notes(notes[:2], 'default')
+    live = [note.pk for note in reversed(notes[2:])]
+    deleted = [notes[1].pk, notes[0].pk]
+    assert changelist(admin_client) == live
+    assert changelist(admin_client, deleted='yes') == deleted
+    assert changelist(admin_client, deleted='all') == live + deleted
+
+
+def test_restore_action(admin_client, notes, author):
+    soft_delete_notes(notes[:2], 'default')
+    # Slug первой заметки заняла новая: её восстановить нельзя.
+    Note.objects.create(
+        title='Новая', text='Текст', slug=notes[0].slug, author=author
+    )
+    response = admin_client.post(URL + '?deleted=yes', {
+        'action': 'restore',
+        '_selected_action': [notes[0].pk, notes[1].pk],
+    }, follow=True)
+    assert response.status_code == HTTPStatus.OK
+    messages = [str(message) for message in response.context['messages']]
+    assert messages == [
+        'Восстановлено заметок: 1.',
+        'Не восстановлено заметок: 1 - их slug уже занят.',
+    ]
+    assert Note.objects.filter(pk=notes[1].pk).exists()
+    assert not Note.objects.filter(pk=notes[0].pk).exists()
+    # В журнале синхронизации заметка появляется снова.
+    assert NoteChange.objects.filter(
+        note_id=notes[1].pk, deleted=False
+    ).count() == 2
@@ -0,0 +1,81 @@
+import json
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from notes import api
+from notes.models import Note
+
+# Запросы к базе API выполняет в потоках пула со своими соединениями,
+# поэтому данные тестов должны быть зафиксированы в базе.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+LIST_URL = reverse('notes:api-list')
+
+
+def detail_url(slug):
+    return reverse('notes:api-detail', args=(slug,))
+
+
+def send(client, method, url, data):
+    return getattr(client, method)(
+        url, json.dumps(data), content_type='application/json'
+    )
+
+
+def test_anonymous_user_is_rejected(client):
+    assert client.get(LIST_URL).status_code == HTTPStatus.FORBIDDEN
+
+
+def test_crud(author_client, author):
+    response = send(author_client, 'post', LIST_URL, {
+        'title': 'Заголовок', 'text': 'Текст', 'slug': 'api-note',
+    })
+    assert response.status_code == HTTPStatus.CREATED
+    assert Note.objects.get(slug='api-note').author == author
+    assert author_client.get(detail_url('api-note')).json()['text'] == 'Текст'
+    response = send(
+        author_client, 'patch', detail_url('api-note'), {'text': 'Новый'}
+    )
+    assert response.json()['title'] == 'Заголовок'
+    assert response.json()['text'] == 'Новый'
+    notes = author_client.get(LIST_URL).json()['notes']
+    assert [note['slug'] for note in notes] == ['api-note']
+    response = author_client.delete(detail_url('api-note'))
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert not Note.objects.exists()
+    assert Note.all_objects.get(slug='api-note').deleted_at is not None
+
+
+def test_busy_slug_is_form_error(author_client, note):
+    response = send(author_client, 'post', LIST_URL, {
+        'title': 'Заголовок', 'text': 'Текст', 'slug': note.slug,
+    })
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'slug' in response.json()['errors']
+
+
+def test_other_author_notes_are_hidden(client, note, django_user_model):
+    reader = django_user_model.objects.create(username='Читатель')
+    client.force_login(reader)
+    url = detail_url(note.slug)
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+    response = send(client, 'put', url, {'title': 'Чужая', 'text': 'Текст'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert client.delete(url).status_code == HTTPStatus.NOT_FOUND
+    assert client.get(LIST_URL).json()['notes'] == []
+    assert Note.objects.filter(pk=note.pk).exists()
+
+
+def test_orm_runs_in_pool(author_client, monkeypatch):
+    threads = []
+
+    def detail(author, slug):
+        threads.append(threading.current_thread().name)
+        return {}
+
+    monkeypatch.setattr(api, 'get_note', api.in_orm_pool(detail))
+    author_client.get(detail_url('any'))
+    assert threads[0].startswith('notes-orm')
@@ -0,0 +1,69 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+
+from notes.auth import USER_KEY
+from notes.cache import get_cache
+from notes.checks import check_shared_cache, ensure_shared_cache
+from notes.testing import FILE_CACHE
+from yanote import settings as project_settings
+
+
+def test_logged_in_page_skips_session_and_user_queries(
+    author_client, django_assert_num_queries
+):
+    url = reverse('notes:home')
+    author_client.get(url)
+    # Сессия и пользователь уже в кеше.
+    with django_assert_num_queries(0):
+        response = author_client.get(url)
+    assert response.context['user'].is_authenticated
+
+
+def test_user_edit_invalidates_cached_user(author, author_client):
+    url = reverse('notes:home')
+    author_client.get(url)
+    author.username = 'Новое имя'
+    author.save()
+    response = author_client.get(url)
+    assert 'Новое имя' in response.content.decode()
+
+
+def test_password_change_ends_cached_session(author, author_client):
+    url = reverse('notes:home')
+    author_client.get(url)
+    author.set_password('new-password-123')
+    author.save()
+    response = author_client.get(url)
+    assert not response.context['user'].is_authenticated
+
+
+def test_logout_forgets_cached_user(author, author_client):
+    author_client.get(reverse('notes:home'))
+    assert get_cache().get(USER_KEY.format(author.pk)) is not None
+    author_client.get(reverse('users:logout'))
+    assert get_cache().get(USER_KEY.format(author.pk)) is None
+    response = author_client.get(reverse('notes:home'))
+    assert not response.context['user'].is_authenticated
+
+
+def test_process_local_cache_is_rejected(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+    assert [error.id for error in check_shared_cache(None)] == ['notes.E001']
+    with pytest.raises(ImproperlyConfigured):
+        ensure_shared_cache()
+
+
+def test_tests_use_own_cache_dir(settings):
+    # Каталог кеша проекта общий с сервером разработки, а тесты
+    # работают во временном.
+    project = project_settings.CACHES['default']
+    if project['BACKEND'] != FILE_CACHE:
+        pytest.skip('Кеш не файловый')
+    location = settings.CACHES['default']['LOCATION']
+    assert location != project['LOCATION']
+    assert not location.startswith(str(project_settings.BASE_DIR))
@@ -0,0 +1,70 @@
+import pytest
+from django.db import connections
+
+from notes.benchmarks import compare, percentile
+from notes.benchmarks.concurrency import ConcurrencyBenchmark
+from notes.benchmarks.events import EventsBenchmark
+from notes.benchmarks.templates import TEMPLATES, TemplateBenchmark
+from notes.benchmarks.writes import WriteStress
+
+
+def test_percentile():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 0.5) == 3
+    assert percentile(values, 0.95) == 5
+    assert percentile([], 0.5) == 0.0
+
+
+def test_compare_reports_regressions():
+    baseline = {
+        'notes:list': {'p95_ms': 10, 'queries': 2, 'peak_kb': 100},
+    }
+    current = {
+        'notes:list': {'p95_ms': 11, 'queries': 3, 'peak_kb': 200},
+        'notes:new': {'p95_ms': 1, 'queries': 1, 'peak_kb': 1},
+    }
+    regressions = compare(current, baseline, tolerance=0.2)
+    # Рост p95 на 10% в пределах допуска, а память не проверяется:
+    # остаётся только лишний запрос.
+    assert regressions == ['notes:list: запросов 2 -> 3']
+    current['notes:list']['p95_ms'] = 14
+    assert len(compare(current, baseline, tolerance=0.2)) == 2
+
+
+@pytest.mark.django_db
+def test_production_profile_has_no_lock_errors(tmp_path):
+    stress = WriteStress(tmp_path / 'stress.sqlite3', 'production', notes=10)
+    try:
+        with connections[stress.alias].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            assert cursor.fetchone()[0] == 'wal'
+        result = stress.run(writers=4, operations=20)
+    finally:
+        stress.close()
+    assert result['operations'] == 80
+    # Чтение с последующей записью в одной транзакции не получает
+    # "database is locked": блокировка берётся в начале транзакции.
+    assert result['errors'] == 0
+
+
+@pytest.mark.django_db
+def test_template_benchmark_covers_pages():
+    results = TemplateBenchmark(notes=3).run(iterations=2)
+    assert set(results) == set(TEMPLATES)
+    for row in results.values():
+        assert set(row) == {'before', 'after'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrency_benchmark_compares_api_and_html():
+    results = ConcurrencyBenchmark(notes=3).run([2], requests=2)
+    assert set(results) == {'list', 'detail'}
+    for row in results['detail'].values():
+        assert row['wsgi']['requests'] == row['asgi']['requests'] == 4
+        assert 'loop_lag_p95_ms' in row['asgi']
+
+
+def test_events_benchmark_reaches_every_author_tab():
+    result = EventsBenchmark(connections=20, authors=4).run(publishes=2)
+    assert result['fanout'] == 5
+    assert result['kb_per_connection'] > 0
@@ -0,0 +1,138 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note, NoteChange
+from notes.search import get_backend
+from notes.views import NotesList
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse('notes:bulk')
+
+
+def make_notes(author, count, prefix='Пачка'):
+    return [
+        Note.objects.create(
+            title=f'{prefix} {index}', text='Общее слово', author=author
+        )
+        for index in range(count)
+    ]
+
+
+def delete_queries(client, notes):
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(
+            URL, {'action': 'delete', 'ids': [note.pk for note in notes]}
+        )
+    assert response.status_code == HTTPStatus.FOUND
+    return len(context.captured_queries)
+
+
+def test_bulk_delete_is_scoped_and_batched(
+    author, author_client, admin_user, settings,
+    django_capture_on_commit_callbacks
+):
+    settings.NOTES_JOBS_EAGER = True
+    notes = make_notes(author, 3)
+    other = make_notes(admin_user, 1, prefix='Чужая')[0]
+    author_client.get(reverse('notes:list'))
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(URL, {
+            'action': 'delete',
+            'ids': [notes[0].pk, notes[1].pk, other.pk],
+        })
+    assert set(Note.objects.values_list('pk', flat=True)) == {
+        notes[2].pk, other.pk
+    }
+    # Заметки только помечены удалёнными, их окончательно удалит
+    # purge_notes.
+    assert Note.all_objects.filter(
+        pk__in=(notes[0].pk, notes[1].pk), deleted_at__isnull=False
+    ).count() == 2
+    tombstones = NoteChange.objects.filter(deleted=True)
+    assert sorted(tombstones.values_list('note_id', flat=True)) == [
+        notes[0].pk, notes[1].pk
+    ]
+    results = get_backend().search(author.pk, 'общее')
+    assert [result.note_id for result in results] == [notes[2].pk]
+    response = author_client.get(reverse('notes:list'))
+    assert response['X-Cache'] == 'MISS'
+    assert list(response.context['object_list']) == [notes[2]]
+
+
+def test_bulk_delete_queries_do_not_grow(author, author_client):
+    # Число запросов не зависит от размера пачки.
+    author_client.get(reverse('notes:list'))
+    few = delete_queries(author_client, make_notes(author, 2))
+    many = delete_queries(author_client, make_notes(author, 20))
+    assert few == many
+
+
+def test_bulk_export(author, author_client, admin_user):
+    notes = make_notes(author, 2)
+    other = make_notes(admin_user, 1, prefix='Чужая')[0]
+    response = author_client.post(URL, {
+        'action': 'export',
+        'ids': [notes[1].pk, other.pk],
+    })
+    assert response.status_code == HTTPStatus.OK
+    assert response['Content-Type'].startswith('application/x-ndjson')
+    assert response.streaming
+    content = b''.join(response.streaming_content).decode()
+    records = [json.loads(line) for line in content.splitlines()]
+    assert records == [{
+        'title': notes[1].title,
+        'text': notes[1].text,
+        'slug': notes[1].slug,
+        'author': author.username,
+    }]
+
+
+def test_bulk_unknown_action(author_client):
+    response = author_client.post(URL, {'action': 'drop', 'ids': ['1']})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_bulk_form_uses_csrf_cookie(author, note):
+    # Закешированная страница списка без токена: он берётся из cookie.
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(author)
+    client.get(reverse('notes:list'))
+    response = client.get(reverse('notes:list'))
+    assert response['X-Cache'] == 'HIT'
+    token = client.cookies['csrftoken'].value
+    response = client.post(URL, {
+        'action': 'delete',
+        'ids': [note.pk],
+        'csrfmiddlewaretoken': token,
+    })
+    assert response.status_code == HTTPStatus.FOUND
+    assert not Note.objects.exists()
+
+
+def test_bulk_export_csv(author, author_client):
+    notes = make_notes(author, 2)
+    response = author_client.post(URL, {
+        'action': 'export',
+        'format': 'csv',
+        'ids': [note.pk for note in notes],
+    })
+    content = b''.join(response.streaming_content).decode()
+    assert content.splitlines()[0] == 'title,text,slug,author'
+    assert len(content.splitlines()) == 3
+
+
+def test_bulk_ids_are_capped(author, author_client):
+    notes = make_notes(author, NotesList.paginate_by + 1)
+    author_client.post(URL, {
+        'action': 'delete', 'ids': [note.pk for note in notes],
+    })
+    assert list(Note.objects.values_list('pk', flat=True)) == [
+        notes[-1].pk
+    ]
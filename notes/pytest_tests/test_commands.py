@@ -0,0 +1,73 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+
+from notes.models import Note
+from notes.search import get_backend
+from notes.slugs import allocate_slugs
+
+
+def test_notes_import_jsonl(author, note, tmp_path):
+    path = tmp_path / 'notes.jsonl'
+    records = (
+        {'title': 'Первая', 'text': 'Один', 'author': author.username},
+        {'title': 'Вторая', 'text': 'Два', 'slug': note.slug,
+         'author': author.username},
+        {'title': 'Третья', 'text': 'Три', 'slug': note.slug,
+         'author': author.username},
+        {'title': 'Чужая', 'text': 'Нет автора', 'author': 'unknown'},
+    )
+    path.write_text(
+        '\n'.join(json.dumps(record) for record in records),
+        encoding='utf-8',
+    )
+    call_command('notes_import', str(path), batch_size=2, stdout=StringIO())
+    # Заметка с неизвестным автором пропущена.
+    assert Note.objects.count() == 4
+    slugs = set(Note.objects.values_list('slug', flat=True))
+    # Занятые slug получили свободные суффиксы.
+    assert slugs == {note.slug, 'pervaya', f'{note.slug}-2', f'{note.slug}-3'}
+    # Импортированные заметки попали в поисковый индекс.
+    results = get_backend().search(author.pk, 'три')
+    assert [result.note_id for result in results] == [
+        Note.objects.get(title='Третья').pk
+    ]
+
+
+def test_notes_export_import_roundtrip_csv(author, note, tmp_path):
+    path = tmp_path / 'notes.csv'
+    call_command('notes_export', str(path), stderr=StringIO())
+    note.delete()
+    call_command('notes_import', str(path), stdout=StringIO())
+    restored = Note.objects.get()
+    assert (restored.title, restored.text, restored.slug, restored.author) == (
+        note.title, note.text, note.slug, author
+    )
+
+
+def test_notes_export_to_stdout(note):
+    stdout = StringIO()
+    call_command('notes_export', stdout=stdout, stderr=StringIO())
+    record = json.loads(stdout.getvalue())
+    assert record['slug'] == note.slug
+    assert record['author'] == note.author.username
+
+
+def test_seed_notes(django_user_model):
+    call_command('seed_notes', users=3, notes=300, batch_size=70,
+                 stdout=StringIO())
+    assert django_user_model.objects.count() == 3
+    slugs = list(Note.objects.values_list('slug', flat=True))
+    assert len(slugs) == len(set(slugs)) == 300
+    # Частые заголовки дают одинаковые основы slug.
+    assert Note.objects.filter(slug__startswith='spisok-pokupok-').exists()
+
+
+def test_allocate_slugs_remembers_issued(note):
+    issued = {}
+    first = allocate_slugs(Note.objects, ['new', note.slug], issued)
+    # Пачка ещё не записана, но её slug повторно не выдаются.
+    second = allocate_slugs(Note.objects, ['new', note.slug], issued)
+    assert first == ['new', f'{note.slug}-2']
+    assert second == ['new-2', f'{note.slug}-3']
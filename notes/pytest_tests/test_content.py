@@ -1,8 +1,14 @@
 # test_content.py
 import pytest
 
+from http import HTTPStatus
+
 from django.urls import reverse
 
+from notes import cache
+from notes.models import Note
+from notes.views import NotesList
+
 
 @pytest.mark.parametrize(
     'parametrized_client, note_in_list',
@@ -37,4 +43,116 @@ def test_pages_contains_form(author_client, name, args):
     # Запрашиваем нужную страницу:
     response = author_client.get(url)
     # Проверяем, есть ли объект формы в словаре контекста:
-    assert 'form' in response.context
\ No newline at end of file
+    assert 'form' in response.context
+
+
+def test_notes_list_keyset_pagination(author, author_client, monkeypatch):
+    # Уменьшаем размер страницы, чтобы не создавать много заметок.
+    monkeypatch.setattr(NotesList, 'paginate_by', 2)
+    notes = [
+        Note.objects.create(
+            title=f'Заметка {index}', text='Текст', author=author,
+            slug=f'note-{index}',
+        )
+        for index in range(5)
+    ]
+    url = reverse('notes:list')
+    first_page = author_client.get(url).context['page_obj']
+    assert list(first_page) == notes[:2]
+    assert not first_page.has_previous()
+    # Переходим вперёд по курсору следующей страницы.
+    response = author_client.get(url, {'after': first_page.next_cursor})
+    second_page = response.context['page_obj']
+    assert list(second_page) == notes[2:4]
+    # И возвращаемся назад по курсору предыдущей.
+    response = author_client.get(
+        url, {'before': second_page.previous_cursor}
+    )
+    assert list(response.context['page_obj']) == notes[:2]
+    last_page = author_client.get(
+        url, {'after': second_page.next_cursor}
+    ).context['page_obj']
+    assert list(last_page) == notes[4:]
+    assert not last_page.has_next()
+
+
+def test_notes_list_invalid_cursor(author_client):
+    response = author_client.get(reverse('notes:list'), {'after': 'abc'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_detail_page_is_cached_until_note_changes(
+    author_client, note, django_capture_on_commit_callbacks
+):
+    url = reverse('notes:detail', args=(note.slug,))
+    assert author_client.get(url)['X-Cache'] == 'MISS'
+    response = author_client.get(url)
+    assert response['X-Cache'] == 'HIT'
+    assert note.text in response.content.decode()
+    # Изменение заметки увеличивает версию кеша автора.
+    note.text = 'Обновлённый текст'
+    with django_capture_on_commit_callbacks(execute=True):
+        note.save()
+    response = author_client.get(url)
+    assert response['X-Cache'] == 'MISS'
+    assert note.text in response.content.decode()
+
+
+def test_list_cache_is_invalidated_by_delete(
+    author_client, note, django_capture_on_commit_callbacks
+):
+    url = reverse('notes:list')
+    author_client.get(url)
+    assert note.title in author_client.get(url).content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        note.delete()
+    response = author_client.get(url)
+    assert response['X-Cache'] == 'MISS'
+    assert note.title not in response.content.decode()
+
+
+def test_cache_version_changes_on_commit(
+    author, note, django_capture_on_commit_callbacks
+):
+    # До фиксации параллельный запрос ещё читает старые строки: если
+    # бы версия уже сменилась, он закешировал бы их под новой.
+    version = cache.get_version(author.pk)
+    with django_capture_on_commit_callbacks() as callbacks:
+        note.save()
+        assert cache.get_version(author.pk) == version
+    for callback in callbacks:
+        callback()
+    assert cache.get_version(author.pk) != version
+
+
+def test_cached_pages_are_per_user(author_client, admin_client, note):
+    url = reverse('notes:list')
+    author_client.get(url)
+    response = admin_client.get(url)
+    assert response['X-Cache'] == 'MISS'
+    assert note.title not in response.content.decode()
+
+
+def test_detail_conditional_get(author_client, note):
+    url = reverse('notes:detail', args=(note.slug,))
+    response = author_client.get(url)
+    assert response.has_header('Last-Modified')
+    etag = response['ETag']
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    note.save()
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_list_conditional_get(
+    author_client, note, django_capture_on_commit_callbacks
+):
+    url = reverse('notes:list')
+    etag = author_client.get(url)['ETag']
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    with django_capture_on_commit_callbacks(execute=True):
+        note.delete()
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,107 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+
+from notes import events
+from notes.models import Note
+from yanote.asgi import application
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_overflow_is_replaced_with_reset():
+    async def scenario():
+        subscription = events.Subscription(author_id=1, size=2)
+        try:
+            for index in range(3):
+                events.publish(1, {'type': 'created', 'id': index})
+            # Другой автор в этот канал не попадает.
+            events.publish(2, {'type': 'created', 'id': 100})
+            await asyncio.sleep(0)
+            first = await subscription.get(timeout=1)
+            second = await subscription.get(timeout=0.01)
+        finally:
+            subscription.close()
+        return first, second
+
+    first, second = run(scenario())
+    assert first == {'type': 'reset'}
+    assert second is None
+
+
+@pytest.mark.django_db
+def test_note_changes_are_published(
+    author, note, django_capture_on_commit_callbacks
+):
+    published = []
+    channel = events.channel_for(author.pk)
+    events.get_backend().subscribe(channel, published.append)
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            note.title = 'Новый заголовок'
+            note.save()
+            Note.objects.create(title='Вторая', text='Текст', author=author)
+            note.delete()
+    finally:
+        events.get_backend().unsubscribe(channel, published.append)
+    assert [event['type'] for event in published] == [
+        'updated', 'created', 'deleted'
+    ]
+    assert published[0]['title'] == 'Новый заголовок'
+
+
+async def request_stream(cookie, actions):
+    """Открывает поток событий, выполняет actions и отключается."""
+    messages = []
+    received = asyncio.Queue()
+    started = asyncio.Event()
+
+    async def receive():
+        await started.wait()
+        await actions()
+        # Даём событию дойти до клиента и отключаемся.
+        await received.get()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        if message['type'] == 'http.response.start':
+            started.set()
+        elif message.get('body', b'').startswith(b'event:'):
+            received.put_nowait(message)
+
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': events.STREAM_PATH,
+        'headers': [(b'cookie', cookie.encode())] if cookie else [],
+    }
+    await asyncio.wait_for(application(scope, receive, send), timeout=5)
+    return messages
+
+
+def test_anonymous_user_gets_no_stream():
+    messages = run(request_stream(None, None))
+    assert messages[0]['status'] == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_sends_author_events(author_client, author):
+    cookie = (
+        f'{settings.SESSION_COOKIE_NAME}='
+        f'{author_client.cookies[settings.SESSION_COOKIE_NAME].value}'
+    )
+
+    async def actions():
+        events.publish(author.pk, {'type': 'created', 'id': 1})
+
+    messages = run(request_stream(cookie, actions))
+    assert messages[0]['status'] == HTTPStatus.OK
+    assert (b'content-type', b'text/event-stream') in messages[0]['headers']
+    assert messages[1]['body'].startswith(b'event: created\n')
+    # После отключения подписка удалена.
+    assert not events.get_backend().listeners
@@ -0,0 +1,42 @@
+from django.db import connection
+from django.urls import reverse
+
+from notes.fields import PLAIN, ZLIB, StoredText
+from notes.models import Note
+
+LONG_TEXT = 'Очень длинная заметка. ' * 500
+
+
+def stored_text(note):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT text FROM notes_note WHERE id = %s', (note.pk,))
+        return bytes(cursor.fetchone()[0])
+
+
+def test_large_text_is_stored_compressed(author, settings):
+    settings.NOTES_TEXT_COMPRESS_MIN_SIZE = 1024
+    note = Note.objects.create(title='Длинная', text=LONG_TEXT, author=author)
+    raw = stored_text(note)
+    assert raw[:1] == ZLIB
+    assert len(raw) < len(LONG_TEXT.encode())
+    # Текст распаковывается только при обращении к атрибуту.
+    note = Note.objects.get(pk=note.pk)
+    assert isinstance(note.__dict__['text'], StoredText)
+    assert note.text == LONG_TEXT
+
+
+def test_small_text_is_stored_plain(note):
+    assert stored_text(note) == PLAIN + note.text.encode()
+    assert Note.objects.get(pk=note.pk).text == note.text
+
+
+def test_compression_can_be_disabled(author, settings):
+    settings.NOTES_TEXT_COMPRESS_MIN_SIZE = None
+    note = Note.objects.create(title='Длинная', text=LONG_TEXT, author=author)
+    assert stored_text(note)[:1] == PLAIN
+
+
+def test_notes_list_does_not_load_text(author_client, note):
+    response = author_client.get(reverse('notes:list'))
+    listed = response.context['object_list'][0]
+    assert 'text' in listed.get_deferred_fields()
@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from notes import jobs
+from notes.bulk import soft_delete_notes
+from notes.jobs import Worker, enqueue
+from notes.models import Job, Note
+from notes.search import get_backend
+
+pytestmark = pytest.mark.django_db
+
+calls = []
+
+
+@jobs.task('tests.flaky')
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError('Сбой')
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+def search(author, query):
+    results = get_backend().search(author.pk, query)
+    return [result.note_id for result in results]
+
+
+def test_index_is_updated_by_worker(author):
+    note = Note.objects.create(title='Фон', text='Текст', author=author)
+    note.text = 'Другой текст'
+    note.save()
+    # Запрос оплатил только вставку, и ключ не дал поставить дубль.
+    # Индекс и отрисовку Markdown обновляет одна задача.
+    assert list(Job.objects.values_list('name', flat=True)) == [
+        'notes.reindex_note'
+    ]
+    assert search(author, 'другой') == []
+    assert Worker('default').run_once() == 1
+    assert search(author, 'другой') == [note.pk]
+    assert not Job.objects.exists()
+
+
+def test_soft_delete_is_unindexed_by_worker(author):
+    notes = [
+        Note.objects.create(title=f'Фон {i}', text='Текст', author=author)
+        for i in range(2)
+    ]
+    Worker('default').run_once()
+    soft_delete_notes(notes, 'default')
+    # Вся пачка - одна задача; до её выполнения индекс прежний.
+    assert Job.objects.get().name == 'notes.reindex_notes'
+    assert len(search(author, 'фон')) == 2
+    assert Worker('default').run_once() == 1
+    assert search(author, 'фон') == []
+
+
+def test_rolled_back_job_is_not_queued():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            enqueue('tests.flaky', {'fail_times': 0})
+            raise RuntimeError
+    assert not Job.objects.exists()
+
+
+def test_failed_job_is_retried_then_marked_failed(settings):
+    settings.NOTES_JOBS_MAX_ATTEMPTS = 2
+    enqueue('tests.flaky', {'fail_times': 5})
+    worker = Worker('default')
+    worker.run_once()
+    job = Job.objects.get()
+    assert job.status == Job.PENDING
+    assert job.run_at > timezone.now()
+    assert 'Сбой' in job.last_error
+    # До срока повтора задача не берётся.
+    assert worker.run_once() == 0
+    Job.objects.update(run_at=timezone.now())
+    worker.run_once()
+    assert Job.objects.get().status == Job.FAILED
+    assert len(calls) == 2
+
+
+def test_failed_job_yields_to_queued_duplicate():
+    enqueue('tests.flaky', {'fail_times': 1}, key='tests.flaky:1')
+    worker = Worker('default')
+    [job] = worker.claim()
+    # Пока задача выполняется, ставится такая же.
+    enqueue('tests.flaky', {'fail_times': 1}, key='tests.flaky:1')
+    assert worker.execute(job) is False
+    queued = Job.objects.get()
+    assert queued.pk != job.pk
+    assert queued.status == Job.PENDING
+    assert worker.run_once() == 1
+    assert not Job.objects.exists()
+
+
+def test_expired_lease_is_reclaimed():
+    enqueue('tests.flaky', {'fail_times': 0})
+    Job.objects.update(
+        status=Job.RUNNING,
+        attempts=1,
+        locked_until=timezone.now() - timedelta(seconds=1),
+    )
+    assert Worker('default').run_once() == 1
+    assert calls == [0]
+    assert not Job.objects.exists()
+
+
+def test_run_workers_once():
+    enqueue('tests.flaky', {'fail_times': 0})
+    call_command('run_workers', once=True, workers=1)
+    assert calls == [0]
+    assert not Job.objects.exists()
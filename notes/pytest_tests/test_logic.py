@@ -6,11 +6,14 @@ from pytest_django.asserts import assertRedirects, assertFormError
 
 from pytils.translit import slugify
 
+from django.db import IntegrityError
 from django.urls import reverse
 
 from notes.forms import WARNING
 
-from notes.models import Note
+from notes.models import SLUG_ATTEMPTS, Note
+
+from notes.slugs import allocate_slug
 
 
 # Указываем фикстуру form_data в параметрах теста.
@@ -62,6 +65,32 @@ def test_not_unique_slug(author_client, note, form_data):
     assert Note.objects.count() == 1
 
 
+def test_slug_race_gives_up_after_attempts(author, note, monkeypatch):
+    # Подобранный slug каждый раз оказывается занят.
+    calls = []
+
+    def taken_allocate(queryset, slug):
+        calls.append(slug)
+        return note.slug
+
+    monkeypatch.setattr('notes.models.allocate_slug', taken_allocate)
+    with pytest.raises(IntegrityError):
+        Note.objects.create(title='Заголовок', text='Текст', author=author)
+    assert len(calls) == SLUG_ATTEMPTS
+    assert Note.objects.count() == 1
+
+
+def test_other_integrity_error_is_not_slug_error(
+    author_client, form_data, monkeypatch
+):
+    def save(self, *args, **kwargs):
+        raise IntegrityError('NOT NULL constraint failed: notes_note.text')
+
+    monkeypatch.setattr(Note, 'save', save)
+    with pytest.raises(IntegrityError):
+        author_client.post(reverse('notes:add'), data=form_data)
+
+
 def test_empty_slug(author_client, form_data):
     url = reverse('notes:add')
     # Убираем поле slug из словаря:
@@ -119,3 +148,76 @@ def test_other_user_cant_delete_note(admin_client, form_data, slug_for_args):
     response = admin_client.post(url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Note.objects.count() == 1
+
+
+def test_empty_slug_gets_free_suffix(author_client, note, form_data):
+    url = reverse('notes:add')
+    form_data['title'] = note.title
+    form_data.pop('slug')
+    for _ in range(2):
+        response = author_client.post(url, data=form_data)
+        assertRedirects(response, reverse('notes:success'))
+    base = slugify(note.title)
+    slugs = set(
+        Note.objects.exclude(pk=note.pk).values_list('slug', flat=True)
+    )
+    assert slugs == {base, f'{base}-2'}
+
+
+def test_allocate_slug_uses_one_query(note, django_assert_num_queries):
+    Note.objects.create(
+        title='Другая', text='Текст', slug=f'{note.slug}-7', author=note.author
+    )
+    with django_assert_num_queries(1):
+        slug = allocate_slug(Note.objects.all(), note.slug)
+    assert slug == f'{note.slug}-8'
+
+
+def test_slug_race_is_retried(author, note, monkeypatch):
+    # Имитируем гонку: первый подбор возвращает уже занятый slug.
+    calls = []
+
+    def racy_allocate(queryset, slug):
+        calls.append(slug)
+        return note.slug if len(calls) == 1 else allocate_slug(queryset, slug)
+
+    monkeypatch.setattr('notes.models.allocate_slug', racy_allocate)
+    new_note = Note.objects.create(
+        title='Заголовок', text='Текст', author=author
+    )
+    assert len(calls) == 2
+    assert new_note.slug == slugify('Заголовок')
+
+
+def test_explicit_slug_race_is_form_error(
+        author_client, note, form_data, monkeypatch
+):
+    # Проверка уникальности прошла, но slug заняли до вставки.
+    monkeypatch.setattr(Note, 'validate_unique', lambda *args, **kw: None)
+    form_data['slug'] = note.slug
+    response = author_client.post(reverse('notes:add'), data=form_data)
+    assertFormError(response, 'form', 'slug', errors=(note.slug + WARNING))
+    assert Note.objects.count() == 1
+
+
+def test_edit_with_stale_if_match_is_rejected(author_client, note, form_data):
+    etag = author_client.get(
+        reverse('notes:detail', args=(note.slug,))
+    )['ETag']
+    # Заметку изменили в другой вкладке.
+    note.text = 'Изменения из другой вкладки'
+    note.save()
+    url = reverse('notes:edit', args=(note.slug,))
+    response = author_client.post(url, form_data, HTTP_IF_MATCH=etag)
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+    note.refresh_from_db()
+    assert note.text == 'Изменения из другой вкладки'
+
+
+def test_edit_with_current_if_match(author_client, note, form_data):
+    etag = author_client.get(
+        reverse('notes:detail', args=(note.slug,))
+    )['ETag']
+    url = reverse('notes:edit', args=(note.slug,))
+    response = author_client.post(url, form_data, HTTP_IF_MATCH=etag)
+    assertRedirects(response, reverse('notes:success'))
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from notes import rendering
+from notes.cache import get_cache
+from notes.jobs import Worker
+from notes.models import Note
+from notes.rendering import get_lru, render_key, render_markdown
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def parses(monkeypatch):
+    """Считает разборы Markdown; кеши каждый тест начинается пустыми."""
+    get_lru().clear()
+    get_cache().clear()
+    texts = []
+    render = rendering.render
+
+    def counting_render(text):
+        texts.append(text)
+        return render(text)
+
+    monkeypatch.setattr(rendering, 'render', counting_render)
+    return texts
+
+
+def test_markdown_is_sanitized():
+    html = render_markdown(
+        '# Заголовок\n\n**жирный** <script>alert(1)</script>\n\n'
+        '[ссылка](javascript:alert(1)) https://example.com'
+    )
+    assert '<h1>Заголовок</h1>' in html
+    assert '<strong>жирный</strong>' in html
+    assert '<script>' not in html
+    assert 'javascript:' not in html
+    assert (
+        '<a href="https://example.com" rel="nofollow">https://example.com</a>'
+        in html
+    )
+
+
+def test_text_is_parsed_once(parses):
+    render_markdown('*один*')
+    render_markdown('*один*')
+    # Другой процесс: своего LRU нет, HTML берётся из общего кеша.
+    get_lru().clear()
+    render_markdown('*один*')
+    assert parses == ['*один*']
+
+
+def test_note_is_rendered_on_save(author, author_client, parses):
+    note = Note.objects.create(title='Md', text='_курсив_', author=author)
+    assert get_cache().get(render_key(note.text)) is None
+    Worker('default').run_once()
+    assert parses == ['_курсив_']
+    url = reverse('notes:detail', args=(note.slug,))
+    response = author_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert '<em>курсив</em>' in response.content.decode()
+    assert parses == ['_курсив_']
+
+
+def test_render_version_changes_page_and_etag(
+    author_client, note, parses, monkeypatch
+):
+    url = reverse('notes:detail', args=(note.slug,))
+    author_client.get(url)
+    response = author_client.get(url)
+    assert response['X-Cache'] == 'HIT'
+    etag = response['ETag']
+    # Новые правила отрисовки: прежний HTML не отдаётся ни из кеша
+    # страниц, ни ответом 304.
+    monkeypatch.setattr(rendering, 'RENDER_VERSION', 2)
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['X-Cache'] == 'MISS'
+    assert response['ETag'] != etag
+    assert parses == [note.text, note.text]
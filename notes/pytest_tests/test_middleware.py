@@ -0,0 +1,115 @@
+import gzip
+import json
+import logging
+import zlib
+from http import HTTPStatus
+
+import brotli
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from notes.middleware import CompressionMiddleware, RequestMetricsMiddleware
+from notes.models import Note
+
+
+def server_timing(response):
+    return dict(
+        item.split(';', 1) for item in response['Server-Timing'].split(', ')
+    )
+
+
+def test_server_timing_header(author_client, note):
+    response = author_client.get(reverse('notes:detail', args=(note.slug,)))
+    timing = server_timing(response)
+    assert set(timing) == {'db', 'tpl', 'total'}
+    assert 'queries' in timing['db']
+
+
+def test_metrics_are_logged(author_client, caplog):
+    with caplog.at_level(logging.INFO, logger='notes.metrics'):
+        author_client.get(reverse('notes:list'))
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['path'] == reverse('notes:list')
+    assert record['queries'] > 0
+
+
+def test_n_plus_one_is_reported(rf, author, settings, caplog):
+    settings.NOTES_METRICS_N_PLUS_ONE_THRESHOLD = 3
+    for index in range(3):
+        Note.objects.create(
+            title=f'Заметка {index}', text='Текст', author=author
+        )
+
+    def view(request):
+        # Классическая ошибка: автор запрашивается для каждой заметки.
+        names = [note.author.username for note in Note.objects.all()]
+        return HttpResponse(', '.join(names))
+
+    with caplog.at_level(logging.WARNING, logger='notes.metrics'):
+        RequestMetricsMiddleware(view)(rf.get('/'))
+    problem = json.loads(caplog.records[-1].getMessage())
+    assert problem['problem'] == 'n+1'
+    assert problem['count'] == 3
+
+
+def test_large_note_is_compressed(author_client, note):
+    note.text = 'Длинный текст заметки. ' * 200
+    note.save()
+    url = reverse('notes:detail', args=(note.slug,))
+    response = author_client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+    assert response['Content-Encoding'] == 'br'
+    assert 'Accept-Encoding' in response['Vary']
+    assert note.text in brotli.decompress(response.content).decode()
+    # Без brotli клиент получает gzip, без заголовка - исходное тело.
+    response = author_client.get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+    assert response['Content-Encoding'] == 'gzip'
+    assert note.text in gzip.decompress(response.content).decode()
+    response = author_client.get(url)
+    assert not response.has_header('Content-Encoding')
+
+
+def test_compressed_etag_round_trip(author_client, note, form_data):
+    note.text = 'Длинный текст заметки. ' * 200
+    note.save()
+    url = reverse('notes:detail', args=(note.slug,))
+    response = author_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+    assert response['Content-Encoding'] == 'gzip'
+    etag = response['ETag']
+    # ETag сильный, но отличается от ETag несжатого тела.
+    assert etag.endswith('-gzip"')
+    assert etag != author_client.get(url)['ETag']
+    response = author_client.get(
+        url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    # Сохранение с ETag сжатой страницы проходит проверку If-Match.
+    response = author_client.post(
+        reverse('notes:edit', args=(note.slug,)), form_data,
+        HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_MATCH=etag,
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    note.refresh_from_db()
+    assert note.text == form_data['text']
+
+
+def test_small_response_is_not_compressed(rf):
+    middleware = CompressionMiddleware(lambda request: HttpResponse('ok'))
+    response = middleware(rf.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+    assert not response.has_header('Content-Encoding')
+    assert response.content == b'ok'
+
+
+def test_streaming_response_is_compressed_by_chunks(rf):
+    chunks = [f'Часть {index}. '.encode() * 50 for index in range(3)]
+    middleware = CompressionMiddleware(
+        lambda request: StreamingHttpResponse(iter(chunks))
+    )
+    response = middleware(rf.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+    assert response['Content-Encoding'] == 'gzip'
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    stream = iter(response.streaming_content)
+    # Каждая часть доступна клиенту сразу, не дожидаясь конца ответа.
+    for chunk in chunks:
+        assert decompressor.decompress(next(stream)) == chunk
+    decompressor.decompress(b''.join(stream))
+    assert decompressor.eof
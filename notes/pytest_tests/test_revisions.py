@@ -0,0 +1,156 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.bulk import bulk_create_notes
+from notes.models import Note, NoteRevision
+from notes.revisions import (
+    apply_delta, compact_revisions, make_delta, revision_text,
+)
+
+pytestmark = pytest.mark.django_db
+
+WORDS = ' '.join(f'слово{index}' for index in range(3000))
+
+
+def edit(note, text):
+    note = Note.objects.get(pk=note.pk)
+    note.text = text
+    note.save()
+    return note
+
+
+def texts(note):
+    return [
+        revision_text(revision)
+        for revision in NoteRevision.objects.filter(note=note)
+        .order_by('number')
+    ]
+
+
+def test_revision_size_follows_edit_size(author):
+    note = Note.objects.create(title='Большая', text=WORDS, author=author)
+    expected = [WORDS]
+    for index in range(5):
+        expected.append(expected[-1].replace(f'слово{index} ', 'правка '))
+        edit(note, expected[-1])
+    assert texts(note) == expected
+    snapshot, *deltas = NoteRevision.objects.filter(note=note).order_by(
+        'number'
+    )
+    assert snapshot.is_snapshot
+    # Дельта одного слова в десятки раз меньше снимка всего текста.
+    assert all(len(delta.data) * 20 < len(snapshot.data) for delta in deltas)
+
+
+@pytest.mark.parametrize('new', (
+    'Начало ' + WORDS + ' конец',
+    WORDS.replace('слово1 ', '').replace('слово2999', 'последнее'),
+    '',
+))
+def test_delta_restores_text(new):
+    assert apply_delta(WORDS, make_delta(WORDS, new)) == new
+
+
+def test_chain_length_is_bounded(author, settings, django_assert_num_queries):
+    settings.NOTES_REVISION_CHAIN_LENGTH = 3
+    note = Note.objects.create(title='Цепочка', text=WORDS, author=author)
+    for index in range(6):
+        edit(note, WORDS + f' конец{index}')
+    revisions = NoteRevision.objects.filter(note=note).order_by('number')
+    assert [revision.base_number for revision in revisions] == [
+        1, 1, 1, 4, 4, 4, 7,
+    ]
+    last = revisions.last()
+    with django_assert_num_queries(1):
+        assert revision_text(last) == WORDS + ' конец5'
+
+
+def test_first_edit_of_old_note_keeps_previous_text(author):
+    note, = bulk_create_notes([
+        Note(title='Старая', text='Старый текст', slug='old', author=author)
+    ])
+    edit(note, 'Новый текст')
+    assert texts(note) == ['Старый текст', 'Новый текст']
+
+
+def test_history_and_restore(author_client, note, client, django_user_model):
+    original = note.text
+    edit(note, 'Испорченный текст')
+    history_url = reverse('notes:history', args=(note.slug,))
+    response = author_client.get(history_url, {'revision': 1})
+    assert response.context['selected'].text == original
+    restore_url = reverse('notes:restore', args=(note.slug, 1))
+    assert author_client.post(restore_url).status_code == HTTPStatus.FOUND
+    note.refresh_from_db()
+    assert note.text == original
+    assert NoteRevision.objects.filter(note=note).count() == 3
+    # Чужая история недоступна, как и сама заметка.
+    client.force_login(django_user_model.objects.create(username='Другой'))
+    assert client.get(history_url).status_code == HTTPStatus.NOT_FOUND
+    assert client.post(restore_url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_compact_revisions(author):
+    note = Note.objects.create(title='Сжатие', text=WORDS, author=author)
+    expected = [WORDS]
+    for index in range(6):
+        expected.append(WORDS + f' правка{index}')
+        edit(note, expected[-1])
+    now = timezone.now()
+    # Ревизии 1-3 - позавчера, 4-5 - вчера, 6-7 - свежие.
+    for numbers, age in (((1, 2, 3), 2), ((4, 5), 1)):
+        NoteRevision.objects.filter(note=note, number__in=numbers).update(
+            created_at=now - timedelta(days=age, hours=1)
+        )
+    call_command('compact_revisions', days=1)
+    revisions = NoteRevision.objects.filter(note=note).order_by('number')
+    assert [revision.number for revision in revisions] == [3, 5, 6, 7]
+    assert revisions[0].is_snapshot
+    assert texts(note) == [expected[2], expected[4], *expected[5:]]
+
+
+def test_compact_revisions_in_batches(author):
+    note = Note.objects.create(title='Пачки', text=WORDS, author=author)
+    expected = [WORDS]
+    for index in range(6):
+        expected.append(WORDS + f' правка{index}')
+        edit(note, expected[-1])
+    NoteRevision.objects.filter(note=note, number__lte=5).update(
+        created_at=timezone.now() - timedelta(days=2)
+    )
+    with CaptureQueriesContext(connection) as context:
+        removed, _, _ = compact_revisions(
+            note.pk, 'default', timezone.now() - timedelta(days=1),
+            batch_size=2,
+        )
+    assert removed == 4
+    # Удаляется по пачке за раз, а не одним списком всех ревизий.
+    deletes = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('DELETE')
+    ]
+    assert len(deletes) == 2
+    assert texts(note) == expected[4:]
+
+
+def test_revision_number_is_taken_under_note_lock(note):
+    # Строка заметки блокируется раньше, чем читается последний номер.
+    with CaptureQueriesContext(connection) as context:
+        edit(note, 'Новый текст')
+    sql = [query['sql'] for query in context.captured_queries]
+    lock = next(
+        index for index, query in enumerate(sql)
+        if query.startswith('SELECT "notes_note"."id" FROM "notes_note"')
+    )
+    latest = next(
+        index for index, query in enumerate(sql)
+        if 'FROM "notes_noterevision"' in query and 'DESC' in query
+    )
+    assert lock < latest
@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.urls import reverse
+
+from notes.models import Note
+from notes.routers import NotesRouter, shard_for
+
+SHARD = 'test-shard'
+
+
+@pytest.fixture
+def shard(tmp_path, settings):
+    # Второй шард - отдельный файл SQLite, первый - тестовая база.
+    connections.databases[SHARD] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'shard.sqlite3'),
+    }
+    call_command('migrate', database=SHARD, verbosity=0)
+    settings.NOTES_DATABASE_SHARDS = ['default', SHARD]
+    yield SHARD
+    connections[SHARD].close()
+    del connections[SHARD]
+    del connections.databases[SHARD]
+
+
+def test_reads_go_to_replicas(settings):
+    settings.NOTES_DATABASE_REPLICAS = {'default': ['replica']}
+    router = NotesRouter()
+    assert router.db_for_read(Note) == 'replica'
+    assert router.db_for_write(Note) == 'default'
+    # Остальные приложения роутер не трогает.
+    assert router.db_for_read(Note.author.field.related_model) is None
+    assert router.allow_migrate('replica', 'notes') is False
+
+
+@pytest.mark.django_db
+def test_notes_are_stored_in_author_shard(shard, django_user_model, client):
+    users = [
+        django_user_model.objects.create(username=f'Автор {index}')
+        for index in range(2)
+    ]
+    author = next(user for user in users if shard_for(user.pk) == shard)
+    # Пользователь скопирован в шард для внешнего ключа.
+    assert django_user_model.objects.using(shard).filter(
+        pk=author.pk
+    ).exists()
+    client.force_login(author)
+    client.post(reverse('notes:add'), {'title': 'Шард', 'text': 'Текст'})
+    assert Note.objects.using(shard).filter(author=author).count() == 1
+    assert not Note.objects.using('default').exists()
+    queryset = Note.objects.for_author(author)
+    assert queryset.db == shard
+    response = client.get(reverse('notes:detail', args=('shard',)))
+    assert response.status_code == HTTPStatus.OK
+    author.delete()
+    # Удаление пользователя удаляет его копию и заметки в шарде.
+    assert not Note.objects.using(shard).exists()
+
+
+@pytest.mark.django_db
+def test_deferred_author_id_does_not_recurse(note):
+    # Без загруженного author_id база берётся из состояния экземпляра.
+    deferred = Note.objects.using('default').only('title').get(pk=note.pk)
+    router = NotesRouter()
+    assert router.db_for_write(Note, instance=deferred) == 'default'
+    assert router.db_for_read(Note, instance=deferred) == 'default'
+    deferred.title = 'Новый заголовок'
+    deferred.save(update_fields=('title',))
+    note.refresh_from_db()
+    assert note.title == 'Новый заголовок'
@@ -18,7 +18,7 @@ def test_pages_availability_for_anonymous_user(client, name):
 
 @pytest.mark.parametrize(
     'name',
-    ('notes:list', 'notes:add', 'notes:success')
+    ('notes:list', 'notes:add', 'notes:success', 'notes:search')
 )
 def test_pages_availability_for_auth_user(admin_client, name):
     url = reverse(name)
@@ -58,6 +58,7 @@ def test_pages_availability_for_different_users(
         ('notes:add', None),
         ('notes:success', None),
         ('notes:list', None),
+        ('notes:search', None),
     ),
 )
 def test_redirects(client, name, args):
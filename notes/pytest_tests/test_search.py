@@ -0,0 +1,136 @@
+from importlib import import_module
+
+import pytest
+
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.migrations.loader import MigrationLoader
+from django.urls import reverse
+
+from notes.models import Note, NoteTerm
+from notes.search import FTS5Backend, TermIndexBackend, get_backend
+
+SEARCH_URL = reverse('notes:search')
+
+
+@pytest.fixture(autouse=True)
+def eager_jobs(settings):
+    # Индекс обновляет фоновая задача; здесь она выполняется сразу.
+    settings.NOTES_JOBS_EAGER = True
+
+
+def found_notes(client, query):
+    response = client.get(SEARCH_URL, {'q': query})
+    return response.context['results']
+
+
+def test_search_finds_author_note(author_client, note):
+    results = found_notes(author_client, 'заметки')
+    assert results == [note]
+    # Совпадение подсвечено, остальной текст экранирован.
+    assert '<mark>заметки</mark>' in results[0].snippet
+
+
+def test_search_is_limited_to_author(admin_client, note):
+    assert found_notes(admin_client, 'заметки') == []
+
+
+def test_search_index_follows_edit_and_delete(author_client, note):
+    note.text = 'Совсем другое содержимое'
+    note.save()
+    assert found_notes(author_client, 'заметки') == []
+    assert found_notes(author_client, 'содержимое') == [note]
+    note.delete()
+    assert found_notes(author_client, 'содержимое') == []
+
+
+def test_author_is_not_a_search_word(author_client, author, note):
+    # Автор хранится в индексе FTS5, но искать по нему нельзя.
+    assert found_notes(author_client, str(author.pk)) == []
+
+
+def test_search_escapes_user_text(author_client, author):
+    Note.objects.create(
+        title='<b>Опасный</b>', text='<script>', slug='xss', author=author
+    )
+    results = found_notes(author_client, 'опасный')
+    assert '<b>' not in results[0].highlighted_title
+    assert '<mark>Опасный</mark>' in results[0].highlighted_title
+
+
+@pytest.mark.django_db
+def test_sqlite_uses_fts5():
+    assert isinstance(get_backend(), FTS5Backend)
+
+
+def test_term_index_backend(author, note, admin_user):
+    backend = TermIndexBackend('default')
+    backend.index([note])
+    results = backend.search(author.pk, 'текст заметки')
+    assert [result.note_id for result in results] == [note.pk]
+    assert backend.search(admin_user.pk, 'текст') == []
+    backend.remove([note.pk])
+    assert backend.search(author.pk, 'текст') == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_search_migration_indexes_compressed_text(author):
+    if not isinstance(get_backend(), FTS5Backend):
+        pytest.skip('FTS5 недоступен')
+    note = Note.objects.create(
+        title='Сжатая', text='большое слово ' * 200, author=author
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT text FROM notes_note WHERE id = %s', [note.pk])
+        assert bytes(cursor.fetchone()[0])[:1] == b'z'
+    migration = import_module('notes.migrations.0011_search_author')
+    apps = MigrationLoader(connection).project_state(
+        ('notes', '0011_search_author')
+    ).apps
+    with connection.schema_editor() as schema_editor:
+        migration.forward_fts(apps, schema_editor)
+    results = get_backend().search(author.pk, 'слово')
+    assert [result.note_id for result in results] == [note.pk]
+    results = get_backend().search(author.pk, 'сжатая')
+    assert 'слово' in results[0].snippet
+
+
+@pytest.fixture
+def old_database(tmp_path):
+    """Отдельная база SQLite, доведённая миграциями до 0002."""
+    alias = 'before-search'
+    connections.databases[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'old.sqlite3'),
+    }
+    call_command('migrate', 'notes', '0002', database=alias, verbosity=0)
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.databases[alias]
+
+
+@pytest.mark.django_db
+def test_term_index_migration_fills_existing_notes(old_database, monkeypatch):
+    # База без FTS5, в которой уже есть заметки.
+    for name in ('0003_search_index', '0011_search_author'):
+        monkeypatch.setattr(
+            import_module(f'notes.migrations.{name}'), 'fts5_available',
+            lambda schema_editor: False,
+        )
+    apps = MigrationLoader(connections[old_database]).project_state(
+        ('notes', '0002_note_author_id_idx')
+    ).apps
+    user = apps.get_model('auth', 'User').objects.using(old_database).create(
+        username='Старый автор'
+    )
+    note = apps.get_model('notes', 'Note').objects.using(old_database).create(
+        title='Старая заметка', text='Забытое слово', slug='old',
+        author=user,
+    )
+    call_command('migrate', database=old_database, verbosity=0)
+    terms = NoteTerm.objects.using(old_database).filter(note_id=note.pk)
+    assert set(terms.values_list('term', 'author_id')) == {
+        ('старая', user.pk), ('заметка', user.pk),
+        ('забытое', user.pk), ('слово', user.pk),
+    }
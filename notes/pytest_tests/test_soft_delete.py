@@ -0,0 +1,88 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.bulk import bulk_delete_notes
+from notes.models import Note, NoteChange, NoteRevision, NoteTerm
+from notes.search import TermIndexBackend
+
+pytestmark = pytest.mark.django_db
+
+
+def test_delete_marks_note(author_client, note):
+    url = reverse('notes:delete', args=(note.slug,))
+    with CaptureQueriesContext(connection) as context:
+        response = author_client.post(url)
+    assert response.status_code == HTTPStatus.FOUND
+    # Строка не удаляется - только одно обновление.
+    sql = [query['sql'] for query in context.captured_queries]
+    assert not any(query.startswith('DELETE') for query in sql)
+    assert len([query for query in sql if query.startswith('UPDATE')]) == 1
+    assert not Note.objects.exists()
+    assert Note.all_objects.get(pk=note.pk).deleted_at is not None
+    assert NoteChange.objects.filter(note_id=note.pk, deleted=True).exists()
+    detail = reverse('notes:detail', args=(note.slug,))
+    assert author_client.get(detail).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_deleted_slug_can_be_reused(author_client, note, form_data):
+    author_client.post(reverse('notes:delete', args=(note.slug,)))
+    form_data['slug'] = note.slug
+    response = author_client.post(reverse('notes:add'), form_data)
+    assert response.status_code == HTTPStatus.FOUND
+    assert Note.objects.get().slug == note.slug
+    assert Note.all_objects.filter(slug=note.slug).count() == 2
+
+
+def test_purge_notes(author):
+    notes = [
+        Note.objects.create(title=f'Заметка {index}', text='Текст',
+                            author=author)
+        for index in range(4)
+    ]
+    old = timezone.now() - timedelta(days=31)
+    Note.objects.filter(pk__in=(notes[0].pk, notes[1].pk)).update(
+        deleted_at=old
+    )
+    Note.objects.filter(pk=notes[2].pk).update(deleted_at=timezone.now())
+    call_command('purge_notes', days=30, batch_size=1, pause=0)
+    assert sorted(Note.all_objects.values_list('pk', flat=True)) == [
+        notes[2].pk, notes[3].pk
+    ]
+    assert not NoteRevision.objects.filter(
+        note_id__in=(notes[0].pk, notes[1].pk)
+    ).exists()
+
+
+def test_purge_keeps_tombstones_and_leaves_no_orphans(author):
+    notes = [
+        Note.objects.create(title=f'Заметка {index}', text='Текст',
+                            author=author)
+        for index in range(3)
+    ]
+    TermIndexBackend('default').index(notes)
+    purged = [notes[0].pk, notes[1].pk]
+    bulk_delete_notes(author, purged)
+    Note.all_objects.filter(pk__in=purged).update(
+        deleted_at=timezone.now() - timedelta(days=31)
+    )
+    call_command('purge_notes', days=30, batch_size=1, pause=0)
+    assert list(Note.all_objects.values_list('pk', flat=True)) == [
+        notes[2].pk
+    ]
+    # Надгробия нужны синхронизации и после окончательного удаления.
+    assert sorted(
+        NoteChange.objects.filter(deleted=True)
+        .values_list('note_id', flat=True)
+    ) == purged
+    assert not NoteRevision.objects.filter(note_id__in=purged).exists()
+    assert not NoteTerm.objects.filter(note_id__in=purged).exists()
+    assert NoteTerm.objects.filter(note_id=notes[2].pk).exists()
+    # Ни одна строка не ссылается на удалённые заметки.
+    connection.check_constraints()
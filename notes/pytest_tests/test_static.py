@@ -0,0 +1,31 @@
+from http import HTTPStatus
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.urls import reverse
+
+BOOTSTRAP = 'vendor/bootstrap/css/bootstrap.min.css'
+
+
+def test_pages_use_vendored_bootstrap(client):
+    content = client.get(reverse('notes:home')).content.decode()
+    assert static(BOOTSTRAP) in content
+    assert 'cdn.jsdelivr.net' not in content
+
+
+def test_static_served_without_collectstatic(client):
+    # Манифеста нет - имя без хеша, файл отдаётся из STATICFILES_DIRS.
+    assert static(BOOTSTRAP) == f'/static/{BOOTSTRAP}'
+    response = client.get(static(BOOTSTRAP))
+    assert response.status_code == HTTPStatus.OK
+    assert response['Content-Type'].startswith('text/css')
+
+
+def test_collectstatic_hashes_and_compresses(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    call_command('collectstatic', interactive=False, verbosity=0)
+    name = staticfiles_storage.stored_name(BOOTSTRAP)
+    assert name != BOOTSTRAP
+    for suffix in ('', '.gz', '.br'):
+        assert (tmp_path / f'{name}{suffix}').exists()
@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+from django.urls import reverse
+
+from notes.models import Note, NoteChange
+
+SYNC_URL = reverse('notes:sync')
+
+
+def sync(client, since=0):
+    response = client.get(SYNC_URL, {'since': since})
+    assert response.status_code == HTTPStatus.OK
+    return response.json()
+
+
+def test_sync_returns_only_new_changes(author_client, author, note):
+    data = sync(author_client)
+    assert [change['id'] for change in data['changes']] == [note.pk]
+    assert data['changes'][0]['note']['text'] == note.text
+    cursor = data['cursor']
+    # Без изменений после курсора ответ пустой.
+    assert sync(author_client, cursor)['changes'] == []
+    other = Note.objects.create(
+        title='Другая', text='Текст', slug='other', author=author
+    )
+    note.text = 'Новый текст'
+    note.save()
+    note.save()
+    data = sync(author_client, cursor)
+    # Два сохранения одной заметки свернулись в одно изменение.
+    assert [change['id'] for change in data['changes']] == [
+        other.pk, note.pk
+    ]
+    assert data['changes'][1]['note']['text'] == 'Новый текст'
+
+
+def test_sync_reports_tombstones(author_client, note):
+    cursor = sync(author_client)['cursor']
+    note_id = note.pk
+    author_client.post(reverse('notes:delete', args=(note.slug,)))
+    change, = sync(author_client, cursor)['changes']
+    assert change['id'] == note_id
+    assert change['deleted'] is True
+    assert change['note'] is None
+
+
+def test_sync_is_limited_to_author(admin_client, note):
+    assert sync(admin_client)['changes'] == []
+
+
+def test_sync_requires_login(client):
+    assert client.get(SYNC_URL).status_code == HTTPStatus.FORBIDDEN
+
+
+def test_sync_rejects_invalid_cursor(author_client):
+    response = author_client.get(SYNC_URL, {'since': 'abc'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_cascade_delete_leaves_tombstone(author, note):
+    note_id = note.pk
+    author.delete()
+    change = NoteChange.objects.filter(note_id=note_id).latest('id')
+    assert change.deleted
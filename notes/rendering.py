@@ -0,0 +1,126 @@
+"""Отрисовка текста заметок из Markdown в безопасный HTML.
+
+HTML зависит только от текста, поэтому ключ кеша - SHA-256 текста
+и версия настроек отрисовки RENDER_VERSION. Такой кеш не нужно
+сбрасывать: изменённый текст просто получает другой ключ.
+
+Кеш двухуровневый: LRU на NOTES_MARKDOWN_LRU_SIZE записей в памяти
+процесса и общий кеш NOTES_CACHE_ALIAS за ним. После сохранения
+заметки фоновая задача notes.reindex_note кладёт её HTML в общий
+кеш, и страница заметки не разбирает Markdown даже в первый раз.
+Исполнители run_workers - отдельные процессы, поэтому задача имеет
+смысл только с кешем, общим для всех процессов: локальный кеш
+процесса отклоняет проверка notes.E001.
+
+RENDER_VERSION входит и в ключи кеша страниц, и в ETag заметки.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import bleach
+import markdown
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+from .cache import get_cache
+
+# Увеличивается при смене расширений или списка разрешённых тегов,
+# чтобы не отдавать HTML, отрисованный по старым правилам.
+RENDER_VERSION = 1
+RENDER_KEY = 'notes:markdown:{}:{}'
+
+EXTENSIONS = ('fenced_code', 'tables', 'sane_lists')
+ALLOWED_TAGS = frozenset((
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'del', 'em', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'li', 'ol', 'p', 'pre', 'strong',
+    'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+))
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+    'abbr': ['title'],
+    'code': ['class'],
+    'td': ['align'],
+    'th': ['align'],
+}
+ALLOWED_PROTOCOLS = frozenset(('http', 'https', 'mailto'))
+
+
+class LRUCache:
+    """Ограниченный по числу записей кеш с вытеснением давних."""
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_lru = None
+
+
+def get_lru():
+    global _lru
+    if _lru is None:
+        _lru = LRUCache(settings.NOTES_MARKDOWN_LRU_SIZE)
+    return _lru
+
+
+def render_key(text):
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    return RENDER_KEY.format(RENDER_VERSION, digest)
+
+
+def render(text):
+    """Разбирает Markdown и вычищает всё, кроме разрешённой разметки.
+
+    Сырой HTML из текста экранируется, ссылки получают rel="nofollow".
+    """
+    html = markdown.markdown(text, extensions=EXTENSIONS)
+    cleaned = bleach.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=ALLOWED_PROTOCOLS,
+    )
+    return bleach.linkify(cleaned, skip_tags=('pre', 'code'))
+
+
+def render_markdown(text):
+    """HTML текста из кеша; Markdown разбирается только при промахе."""
+    key = render_key(text)
+    lru = get_lru()
+    html = lru.get(key)
+    if html is None:
+        shared = get_cache()
+        html = shared.get(key)
+        if html is None:
+            html = render(text)
+            shared.set(key, html, settings.NOTES_MARKDOWN_CACHE_TIMEOUT)
+        lru.set(key, html)
+    return mark_safe(html)
+
+
+def prerender(text):
+    """Кладёт HTML текста в общий кеш, если его там ещё нет."""
+    key = render_key(text)
+    shared = get_cache()
+    if shared.get(key) is None:
+        shared.set(key, render(text), settings.NOTES_MARKDOWN_CACHE_TIMEOUT)
@@ -0,0 +1,246 @@
+"""История правок заметок: снимки и дельты.
+
+Каждое сохранение заметки добавляет ревизию. Обычно это дельта
+к предыдущей ревизии по словам текста: номера отрезков, которые
+не изменились, и вставленный текст, сжатые zlib. Поэтому объём
+истории растёт с размером правки, а не с размером заметки.
+
+Снимок всего текста пишется, если цепочка дельт после последнего
+снимка достигла NOTES_REVISION_CHAIN_LENGTH ревизий или по объёму
+сравнялась с половиной текста. Восстановление любой ревизии - один
+запрос и не больше NOTES_REVISION_CHAIN_LENGTH дельт.
+"""
+import difflib
+import hashlib
+import json
+import re
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .fields import decode_text
+from .models import Note, NoteRevision
+
+# Слово вместе с пробелами после него; склейка токенов даёт исходный
+# текст, а правка в длинной строке не тянет за собой всю строку.
+TOKEN_RE = re.compile(r'\S+\s*|\s+')
+# Сколько ревизий читать и перезаписывать за раз при прореживании.
+BATCH_SIZE = 500
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text)
+
+
+def digest(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def pack(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode())
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def make_delta(old, new):
+    """Дельта: список отрезков [начало, конец] старых токенов и строк.
+
+    Общие начало и конец отбрасываются до сравнения: правка обычно
+    затрагивает небольшой участок, и сравнивать приходится только его.
+    """
+    old_tokens, new_tokens = tokenize(old), tokenize(new)
+    limit = min(len(old_tokens), len(new_tokens))
+    prefix = 0
+    while prefix < limit and old_tokens[prefix] == new_tokens[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < limit - prefix
+           and old_tokens[-suffix - 1] == new_tokens[-suffix - 1]):
+        suffix += 1
+    old_end, new_end = len(old_tokens) - suffix, len(new_tokens) - suffix
+    matcher = difflib.SequenceMatcher(
+        None, old_tokens[prefix:old_end], new_tokens[prefix:new_end]
+    )
+    delta = [[0, prefix]] if prefix else []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([prefix + i1, prefix + i2])
+        elif j1 < j2:
+            delta.append(''.join(new_tokens[prefix + j1:prefix + j2]))
+    if suffix:
+        delta.append([old_end, len(old_tokens)])
+    return delta
+
+
+def apply_delta(old, delta):
+    tokens = tokenize(old)
+    return ''.join(
+        item if isinstance(item, str) else ''.join(tokens[item[0]:item[1]])
+        for item in delta
+    )
+
+
+def revision_text(revision):
+    """Текст ревизии: снимок и не больше длины цепочки дельт."""
+    chain = list(
+        NoteRevision.objects.using(revision._state.db)
+        .filter(
+            note_id=revision.note_id,
+            number__range=(revision.base_number, revision.number),
+        )
+        .order_by('number')
+        .values_list('data', flat=True)
+    )
+    text = zlib.decompress(bytes(chain[0])).decode()
+    for data in chain[1:]:
+        text = apply_delta(text, unpack(data))
+    return text
+
+
+def encode_revision(revision, text, previous, previous_text):
+    """Заполняет data, base_number и chain_size ревизии.
+
+    previous - предыдущая ревизия цепочки (или None), previous_text -
+    её текст.
+    """
+    if previous is not None:
+        chain_length = settings.NOTES_REVISION_CHAIN_LENGTH
+        data = pack(make_delta(previous_text, text))
+        chain_size = previous.chain_size + len(data)
+        if (revision.number - previous.base_number < chain_length
+                and chain_size * 2 < len(text.encode())):
+            revision.data = data
+            revision.base_number = previous.base_number
+            revision.chain_size = chain_size
+            return revision
+    revision.data = zlib.compress(text.encode())
+    revision.base_number = revision.number
+    revision.chain_size = 0
+    return revision
+
+
+def lock_note(note_id, using):
+    """Блокирует строку заметки до конца транзакции.
+
+    Номер ревизии - наибольший занятый плюс один: без блокировки
+    параллельные сохранения получили бы одинаковые номера.
+    """
+    Note.all_objects.using(using).select_for_update().only('pk').get(
+        pk=note_id
+    )
+
+
+def record_revision(note, using):
+    """Добавляет ревизию после сохранения заметки.
+
+    Текст до правки берётся из загруженного экземпляра, поэтому
+    предыдущую ревизию восстанавливать не нужно: хватает её
+    контрольной суммы. Если заметку меняли в обход сохранения
+    (или истории ещё не было), пишется снимок.
+    """
+    with transaction.atomic(using=using):
+        lock_note(note.pk, using)
+        return _record_revision(note, using)
+
+
+def _record_revision(note, using):
+    revisions = NoteRevision.objects.using(using).filter(note=note)
+    latest = revisions.only(
+        'number', 'base_number', 'chain_size', 'digest', 'title'
+    ).order_by('-number').first()
+    text = note.text
+    loaded_title, loaded_text = getattr(note, '_loaded', (None, None))
+    previous_text = decode_text(loaded_text)
+    text_digest = digest(text)
+    if (latest is not None and latest.digest == text_digest
+            and latest.title == note.title):
+        return None
+    if latest is None and previous_text is not None and (
+        previous_text != text or loaded_title != note.title
+    ):
+        # Заметка появилась до истории правок: сохраняем то, что было.
+        latest = encode_revision(
+            NoteRevision(
+                note=note,
+                number=1,
+                title=loaded_title or note.title,
+                digest=digest(previous_text),
+            ),
+            previous_text, None, None,
+        )
+        latest.save(using=using)
+    revision = NoteRevision(
+        note=note,
+        number=latest.number + 1 if latest is not None else 1,
+        title=note.title,
+        digest=text_digest,
+    )
+    if latest is not None and previous_text is not None and (
+        latest.digest == digest(previous_text)
+    ):
+        encode_revision(revision, text, latest, previous_text)
+    else:
+        encode_revision(revision, text, None, None)
+    revision.save(using=using)
+    note._loaded = (note.title, text)
+    return revision
+
+
+def compact_revisions(note_id, using, before, batch_size=BATCH_SIZE):
+    """Прореживает старую историю заметки и перестраивает цепочки.
+
+    Из ревизий старше before остаётся последняя за каждый день,
+    более новые не трогаются. Оставшиеся ревизии кодируются заново
+    от первой: дельты считаются к предыдущей оставшейся ревизии.
+    История читается пачками по batch_size ревизий, а в памяти
+    держатся только текущий текст и текст предыдущей оставшейся
+    ревизии. Возвращает число удалённых ревизий и объём истории
+    до и после.
+    """
+    revisions = NoteRevision.objects.using(using).filter(note_id=note_id)
+    with transaction.atomic(using=using):
+        lock_note(note_id, using)
+        last_of_day = {}
+        old = (
+            revisions.filter(created_at__lt=before).order_by('number')
+            .values_list('number', 'created_at')
+        )
+        for number, created_at in old.iterator():
+            last_of_day[timezone.localdate(created_at)] = number
+        kept_old = set(last_of_day.values())
+        removed_count = size_before = size_after = 0
+        text = previous = previous_text = None
+        last_number = 0
+        while True:
+            batch = list(
+                revisions.filter(number__gt=last_number)
+                .order_by('number')[:batch_size]
+            )
+            if not batch:
+                break
+            kept, removed = [], []
+            for revision in batch:
+                size_before += len(revision.data)
+                if revision.is_snapshot:
+                    text = zlib.decompress(bytes(revision.data)).decode()
+                else:
+                    text = apply_delta(text, unpack(revision.data))
+                if (revision.created_at >= before
+                        or revision.number in kept_old):
+                    encode_revision(revision, text, previous, previous_text)
+                    previous, previous_text = revision, text
+                    size_after += len(revision.data)
+                    kept.append(revision)
+                else:
+                    removed.append(revision.pk)
+            revisions.filter(pk__in=removed).delete()
+            NoteRevision.objects.using(using).bulk_update(
+                kept, ('data', 'base_number', 'chain_size')
+            )
+            removed_count += len(removed)
+            last_number = batch[-1].number
+    return removed_count, size_before, size_after
@@ -0,0 +1,111 @@
+"""Распределение запросов приложения notes по базам данных.
+
+Запись идёт в основную базу, чтение - в одну из её реплик из
+NOTES_DATABASE_REPLICAS ("основная база -> список реплик"). Если
+задан список NOTES_DATABASE_SHARDS, заметки автора и связанные с ними
+записи хранятся в шарде author_id % len(shards). Пользователи
+остаются в default и копируются во все шарды, чтобы работали внешние
+ключи (см. mirror_users).
+
+Уникальность slug в режиме шардирования проверяется индексом каждого
+шарда; страницы заметок всё равно ищут их по паре (автор, slug).
+"""
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS
+
+APP_LABEL = 'notes'
+
+
+def note_databases():
+    """Основные базы, в которых лежат заметки."""
+    return list(settings.NOTES_DATABASE_SHARDS) or [DEFAULT_DB_ALIAS]
+
+
+def shard_for(author_id):
+    """Основная база для заметок автора."""
+    shards = settings.NOTES_DATABASE_SHARDS
+    if not shards or author_id is None:
+        return DEFAULT_DB_ALIAS
+    return shards[author_id % len(shards)]
+
+
+def primary_for(alias):
+    """Основная база, репликой которой является alias."""
+    for primary, replicas in settings.NOTES_DATABASE_REPLICAS.items():
+        if alias in replicas:
+            return primary
+    return alias
+
+
+def _author_id(hints):
+    if 'author_id' in hints:
+        return hints['author_id']
+    instance = hints.get('instance')
+    if instance is None:
+        return None
+    if instance._meta.label == settings.AUTH_USER_MODEL:
+        return instance.pk
+    # Не getattr: отложенное поле загружалось бы через refresh_from_db(),
+    # а он снова спросил бы роутер. Без author_id база выбирается
+    # по instance._state.db.
+    return instance.__dict__.get('author_id')
+
+
+def mirror_users(users, source=DEFAULT_DB_ALIAS):
+    """Создаёт в шардах копии пользователей без пароля."""
+    aliases = [alias for alias in note_databases() if alias != source]
+    if not aliases:
+        return
+    users = list(users)
+    password = make_password(None)
+    User = get_user_model()
+    for alias in aliases:
+        User.objects.using(alias).bulk_create(
+            (
+                User(pk=user.pk, username=user.username, password=password)
+                for user in users
+            ),
+            ignore_conflicts=True,
+        )
+
+
+class NotesRouter:
+    """Роутер для моделей приложения notes; остальные идут в default."""
+
+    def _primary(self, hints):
+        author_id = _author_id(hints)
+        if author_id is not None:
+            return shard_for(author_id)
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return primary_for(instance._state.db)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != APP_LABEL:
+            return None
+        primary = self._primary(hints)
+        replicas = settings.NOTES_DATABASE_REPLICAS.get(primary)
+        return random.choice(replicas) if replicas else primary
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label != APP_LABEL:
+            return None
+        return self._primary(hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Пользователи есть во всех шардах, а связанные заметки
+        # всегда лежат в шарде своего автора.
+        if APP_LABEL in (obj1._meta.app_label, obj2._meta.app_label):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными основной базы.
+        if db != primary_for(db):
+            return False
+        return None
@@ -0,0 +1,202 @@
+"""Полнотекстовый поиск по заметкам.
+
+На SQLite используется виртуальная таблица FTS5, на остальных СУБД -
+инвертированный индекс в модели NoteTerm. Оба варианта обновляются
+при каждом сохранении и удалении заметки, поэтому поиск никогда
+не сканирует Note.text целиком.
+"""
+import re
+from collections import Counter, namedtuple
+
+from django.db import connections
+from django.db.models import Count, Sum
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note, NoteTerm
+
+FTS_TABLE = 'notes_note_fts'
+RESULTS_LIMIT = 50
+SNIPPET_LENGTH = 160
+TERM_MAX_LENGTH = 64
+
+# Маркеры подсветки: их не бывает в пользовательском тексте, поэтому
+# результат можно экранировать целиком и только потом заменить их на теги.
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+TOKEN_RE = re.compile(r'\w+')
+
+SearchResult = namedtuple('SearchResult', ('note_id', 'title', 'snippet'))
+
+
+def tokenize(text):
+    """Разбивает строку на слова в нижнем регистре."""
+    return [token.lower() for token in TOKEN_RE.findall(text or '')]
+
+
+def _render_marks(value):
+    return mark_safe(
+        escape(value)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def fts5_available(connection):
+    """Поддерживает ли подключение таблицы FTS5."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+class FTS5Backend:
+    """Поиск через виртуальную таблицу SQLite FTS5."""
+
+    def __init__(self, using):
+        self.using = using
+
+    def index(self, notes):
+        rows = [
+            (note.pk, note.title, note.text, str(note.author_id))
+            for note in notes
+        ]
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(row[0],) for row in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, text, author) '
+                'VALUES (%s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, note_ids):
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(note_id,) for note_id in note_ids],
+            )
+
+    def search(self, author_id, query, limit=RESULTS_LIMIT):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Каждое слово в кавычках - так пользовательский ввод не может
+        # сломать синтаксис MATCH; звёздочка включает поиск по префиксу.
+        # Автор - тоже слово индекса, поэтому FTS5 пересекает списки
+        # документов и не ранжирует заметки других авторов. Слова
+        # запроса ищутся только в заголовке и тексте.
+        words = ' '.join(f'"{term}"*' for term in terms)
+        match = (
+            f'author : "{int(author_id)}" AND {{title text}} : ({words})'
+        )
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, '
+                f'highlight({FTS_TABLE}, 0, %s, %s), '
+                f"snippet({FTS_TABLE}, 1, %s, %s, '…', 24) "
+                f'FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s',
+                (MARK_START, MARK_END, MARK_START, MARK_END, match, limit),
+            )
+            return [
+                SearchResult(
+                    note_id, _render_marks(title), _render_marks(snippet)
+                )
+                for note_id, title, snippet in cursor.fetchall()
+            ]
+
+
+class TermIndexBackend:
+    """Переносимый поиск по таблице слов NoteTerm."""
+
+    def __init__(self, using):
+        self.using = using
+
+    def index(self, notes):
+        notes = list(notes)
+        NoteTerm.objects.using(self.using).filter(
+            note_id__in=[note.pk for note in notes]
+        ).delete()
+        NoteTerm.objects.using(self.using).bulk_create(
+            NoteTerm(note_id=note.pk, author_id=note.author_id,
+                     term=term[:TERM_MAX_LENGTH], weight=min(weight, 32767))
+            for note in notes
+            for term, weight in Counter(
+                tokenize(note.title) * 2 + tokenize(note.text)
+            ).items()
+        )
+
+    def remove(self, note_ids):
+        NoteTerm.objects.using(self.using).filter(
+            note_id__in=note_ids
+        ).delete()
+
+    def search(self, author_id, query, limit=RESULTS_LIMIT):
+        terms = list(dict.fromkeys(
+            term[:TERM_MAX_LENGTH] for term in tokenize(query)
+        ))
+        if not terms:
+            return []
+        ranked = (
+            NoteTerm.objects.using(self.using)
+            .filter(term__in=terms, author_id=author_id)
+            .values('note_id')
+            .annotate(matched=Count('term'), score=Sum('weight'))
+            .filter(matched=len(terms))
+            .order_by('-score', 'note_id')
+            .values_list('note_id', flat=True)[:limit]
+        )
+        note_ids = list(ranked)
+        notes = Note.objects.using(self.using).only(
+            'id', 'title', 'text'
+        ).in_bulk(note_ids)
+        pattern = re.compile(
+            '|'.join(re.escape(term) for term in terms), re.IGNORECASE
+        )
+        return [
+            SearchResult(
+                note_id,
+                self._highlight(pattern, notes[note_id].title),
+                self._highlight(pattern, self._snippet(
+                    pattern, notes[note_id].text
+                )),
+            )
+            for note_id in note_ids
+            if note_id in notes
+        ]
+
+    @staticmethod
+    def _snippet(pattern, text):
+        found = pattern.search(text)
+        position = found.start() if found else 0
+        start = max(position - SNIPPET_LENGTH // 4, 0)
+        snippet = text[start:start + SNIPPET_LENGTH]
+        if start:
+            snippet = '…' + snippet
+        if start + SNIPPET_LENGTH < len(text):
+            snippet += '…'
+        return snippet
+
+    @staticmethod
+    def _highlight(pattern, value):
+        return _render_marks(
+            pattern.sub(lambda m: MARK_START + m.group() + MARK_END, value)
+        )
+
+
+_backends = {}
+
+
+def get_backend(using='default'):
+    """Возвращает поисковый бэкенд для указанной базы данных."""
+    if using not in _backends:
+        if fts5_available(connections[using]):
+            _backends[using] = FTS5Backend(using)
+        else:
+            _backends[using] = TermIndexBackend(using)
+    return _backends[using]
@@ -0,0 +1,215 @@
+"""Заполнение базы правдоподобными пользователями и заметками."""
+import math
+import random
+import time
+from collections import deque
+from multiprocessing import get_context
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, OperationalError, connections
+
+from .bulk import bulk_create_notes, group_by_database
+from .models import Note
+from .routers import mirror_users
+from .slugs import allocate_slugs, base_slug
+
+User = get_user_model()
+
+WORDS = (
+    'заметка', 'идея', 'план', 'встреча', 'проект', 'задача', 'список',
+    'покупки', 'книга', 'фильм', 'рецепт', 'отпуск', 'работа', 'дом',
+    'семья', 'друзья', 'спорт', 'здоровье', 'учёба', 'курс', 'лекция',
+    'конспект', 'отчёт', 'бюджет', 'расходы', 'доходы', 'цель', 'неделя',
+    'месяц', 'год', 'утро', 'вечер', 'звонок', 'письмо', 'подарок',
+    'праздник', 'поездка', 'билеты', 'гостиница', 'маршрут', 'погода',
+    'сад', 'ремонт', 'мебель', 'машина', 'сервис', 'врач', 'анализы',
+    'тренировка', 'бег', 'йога', 'музыка', 'концерт', 'театр', 'выставка',
+    'статья', 'код', 'ошибка', 'релиз', 'сервер', 'база', 'данных',
+    'важно', 'срочно', 'потом', 'сегодня', 'завтра', 'обязательно',
+    'купить', 'сделать', 'позвонить', 'написать', 'прочитать', 'узнать',
+    'новый', 'старый', 'большой', 'маленький', 'хороший', 'интересный',
+)
+
+# Частые заголовки в разном написании: pytils даёт для них одинаковый
+# slug, поэтому подбор суффиксов проверяется на каждой пачке.
+COMMON_TITLES = (
+    'Список покупок', 'список покупок!', 'СПИСОК ПОКУПОК', 'Список  покупок',
+    'Идеи', 'идеи...', 'Планы на неделю', 'планы на неделю',
+    'Дела на завтра', 'Дела на завтра!', 'Прочитать', 'прочитать',
+    'Рецепт', 'рецепт!', 'Заметка', 'заметка', 'Важно', 'ВАЖНО',
+    'Позвонить', 'позвонить!',
+)
+COMMON_TITLE_SHARE = 0.3
+
+TITLE_MAX_LENGTH = 100
+TEXT_MEDIAN_LENGTH = 400
+TEXT_SIGMA = 1.2
+TEXT_MAX_LENGTH = 200_000
+CORPUS_LENGTH = 256 * 1024
+
+# Сколько раз повторять пачку, если её slug заняли параллельно
+# или база была заблокирована другим процессом.
+BATCH_ATTEMPTS = 5
+
+
+def create_authors(count, prefix='author', password=None):
+    """Создаёт пользователей (если их ещё нет) и возвращает их id."""
+    # Хеш пароля считается один раз: это самая дорогая часть.
+    password = make_password(password)
+    User.objects.bulk_create(
+        (
+            User(username=f'{prefix}-{index}', password=password)
+            for index in range(count)
+        ),
+        ignore_conflicts=True,
+    )
+    authors = list(
+        User.objects.filter(username__startswith=f'{prefix}-')
+        .order_by('pk')[:count]
+    )
+    # bulk_create не отправляет сигналов - копируем в шарды сами.
+    mirror_users(authors)
+    return [author.pk for author in authors]
+
+
+class NoteGenerator:
+    """Источник заметок с правдоподобными длинами заголовка и текста.
+
+    Длина текста распределена логнормально: большинство заметок
+    короткие, но встречаются и тексты на сотни килобайт. Заголовки
+    и авторы идут из одной последовательности, а тексты - из своей,
+    которую каждая пачка задаёт собственным зерном: так пачки можно
+    наполнять в разных процессах с тем же результатом.
+    """
+
+    def __init__(self, author_ids, seed=0):
+        self.author_ids = author_ids
+        self.random = random.Random(seed)
+        self.texts = random.Random(seed)
+        words = []
+        length = 0
+        while length < CORPUS_LENGTH:
+            word = self.texts.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+            if self.texts.random() < 0.1:
+                words[-1] += self.texts.choice('.,!?')
+        self.corpus = ' '.join(words)
+
+    def title(self):
+        if self.random.random() < COMMON_TITLE_SHARE:
+            return self.random.choice(COMMON_TITLES)
+        count = min(max(round(self.random.lognormvariate(1.0, 0.5)), 1), 12)
+        title = ' '.join(self.random.choices(WORDS, k=count))
+        return title.capitalize()[:TITLE_MAX_LENGTH]
+
+    def text(self):
+        length = self.texts.lognormvariate(
+            math.log(TEXT_MEDIAN_LENGTH), TEXT_SIGMA
+        )
+        length = min(max(int(length), 1), TEXT_MAX_LENGTH)
+        if length > len(self.corpus):
+            return (self.corpus * (length // len(self.corpus) + 1))[:length]
+        start = self.texts.randrange(len(self.corpus) - length + 1)
+        return self.corpus[start:start + length]
+
+    def plan(self, size, issued):
+        """Заголовки, slug и авторы пачки.
+
+        issued - общий для всех пачек словарь выданных суффиксов
+        (см. allocate_slugs), поэтому пачки, ещё не записанные
+        в базу, не получат одинаковых slug.
+        """
+        titles = [self.title() for _ in range(size)]
+        slugs = allocate_slugs(
+            Note.objects, [base_slug(title) for title in titles], issued
+        )
+        authors = self.random.choices(self.author_ids, k=size)
+        return list(zip(titles, slugs, authors))
+
+    def notes(self, rows, seed):
+        self.texts.seed(seed)
+        return [
+            Note(title=title, text=self.text(), slug=slug, author_id=author)
+            for title, slug, author in rows
+        ]
+
+
+def save_batch(notes):
+    """Сохраняет пачку; часть пачки для каждой базы - своя транзакция."""
+    for using, group in group_by_database(notes).items():
+        _save_group(group, using)
+
+
+def _save_group(notes, using):
+    for attempt in range(1, BATCH_ATTEMPTS + 1):
+        try:
+            return bulk_create_notes(notes, using=using)
+        except (IntegrityError, OperationalError) as error:
+            # Slug занял кто-то помимо генератора, или другой процесс
+            # держит блокировку базы.
+            if attempt == BATCH_ATTEMPTS:
+                raise
+            for note in notes:
+                note.pk = None
+            if isinstance(error, IntegrityError):
+                slugs = allocate_slugs(
+                    Note.objects.using(using),
+                    [base_slug(note.title) for note in notes],
+                )
+                for note, slug in zip(notes, slugs):
+                    note.slug = slug
+            time.sleep(0.05 * attempt)
+
+
+# Генератор рабочего процесса; создаётся один раз на процесс, чтобы
+# не строить корпус текстов заново для каждой пачки.
+_worker_generator = None
+
+
+def _start_worker(author_ids, seed):
+    global _worker_generator
+    # Процесс получил копии подключений родителя - их нельзя
+    # использовать совместно, открываем свои.
+    connections.close_all()
+    _worker_generator = NoteGenerator(author_ids, seed=seed)
+
+
+def _save_rows(rows, seed):
+    save_batch(_worker_generator.notes(rows, seed))
+    return len(rows)
+
+
+def seed_notes(author_ids, count, batch_size=1000, seed=0, workers=1):
+    """Создаёт count заметок пачками; каждая пачка - своя транзакция.
+
+    Slug подбираются в вызывающем процессе, а тексты, сжатие
+    и запись пачек выполняют workers процессов. Результат не зависит
+    от их числа.
+    """
+    generator = NoteGenerator(author_ids, seed=seed)
+    issued = {}
+    batches = (
+        (generator.plan(min(batch_size, count - start), issued),
+         f'{seed}:{start}')
+        for start in range(0, count, batch_size)
+    )
+    if workers <= 1:
+        for rows, batch_seed in batches:
+            save_batch(generator.notes(rows, batch_seed))
+        return
+    connections.close_all()
+    pool = get_context('fork').Pool(
+        workers, initializer=_start_worker, initargs=(author_ids, seed)
+    )
+    with pool:
+        # Не больше двух пачек в очереди на процесс: память не растёт
+        # вместе с count.
+        pending = deque()
+        for rows, batch_seed in batches:
+            if len(pending) >= 2 * workers:
+                pending.popleft().get()
+            pending.append(pool.apply_async(_save_rows, (rows, batch_seed)))
+        for result in pending:
+            result.get()
@@ -0,0 +1,192 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import events
+from .auth import forget_user
+from .cache import bump_version, bump_versions
+from .jobs import enqueue
+from .models import Note, NoteChange
+from .revisions import record_revision
+from .routers import mirror_users, note_databases
+from .search import get_backend
+
+# Массовые операции в обход Note.save() и Note.delete(): аргументы
+# notes и using.
+notes_bulk_created = Signal()
+notes_bulk_deleted = Signal()
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def reindex_note(sender, instance, using, **kwargs):
+    """Ставит в очередь обновление индекса и отрисовку Markdown."""
+    enqueue(
+        'notes.reindex_note',
+        {'note_id': instance.pk, 'using': using},
+        key=f'notes.reindex_note:{instance.pk}',
+        using=using,
+    )
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_author_cache(sender, instance, using, **kwargs):
+    """Любое изменение заметки сбрасывает кеш страниц её автора.
+
+    Версия меняется после фиксации транзакции: иначе страница,
+    прочитанная параллельным запросом до фиксации, попала бы в кеш
+    уже под новой версией.
+    """
+    author_id = instance.author_id
+    transaction.on_commit(lambda: bump_version(author_id), using=using)
+
+
+@receiver(post_save, sender=Note)
+def publish_note_saved(sender, instance, created, using, **kwargs):
+    """Сообщает открытым страницам автора о новой или изменённой заметке."""
+    event = events.note_event('created' if created else 'updated', instance)
+    transaction.on_commit(
+        lambda: events.publish(instance.author_id, event), using=using
+    )
+
+
+@receiver(post_delete, sender=Note)
+def publish_note_deleted(sender, instance, using, **kwargs):
+    event = events.note_event('deleted', instance)
+    transaction.on_commit(
+        lambda: events.publish(instance.author_id, event), using=using
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_cache(sender, instance, using, **kwargs):
+    """Имя пользователя выводится в шапке закешированных страниц.
+
+    Версия меняется сразу, чтобы новый пользователь не получил версию
+    прежнего владельца того же id, и ещё раз после фиксации - как у
+    заметок.
+    """
+    user_id = instance.pk
+    bump_version(user_id)
+    transaction.on_commit(lambda: bump_version(user_id), using=using)
+
+
+@receiver(notes_bulk_created, sender=Note)
+def index_notes_batch(sender, notes, using, **kwargs):
+    """Индексирует пачку заметок одной операцией."""
+    get_backend(using).index(notes)
+
+
+@receiver(notes_bulk_deleted, sender=Note)
+def unindex_notes_batch(sender, notes, using, **kwargs):
+    """Ставит в очередь одну задачу на всю пачку, как reindex_note."""
+    enqueue(
+        'notes.reindex_notes',
+        {'note_ids': [note.pk for note in notes], 'using': using},
+        using=using,
+    )
+
+
+@receiver(notes_bulk_created, sender=Note)
+@receiver(notes_bulk_deleted, sender=Note)
+def invalidate_authors_cache(sender, notes, using, **kwargs):
+    author_ids = {note.author_id for note in notes}
+    transaction.on_commit(lambda: bump_versions(author_ids), using=using)
+
+
+@receiver(notes_bulk_deleted, sender=Note)
+def publish_notes_deleted(sender, notes, using, **kwargs):
+    """События всей пачки публикуются одним обработчиком on_commit."""
+    deleted = [
+        (note.author_id, events.note_event('deleted', note)) for note in notes
+    ]
+
+    def publish():
+        for author_id, event in deleted:
+            events.publish(author_id, event)
+
+    transaction.on_commit(publish, using=using)
+
+
+@receiver(post_save, sender=Note)
+def record_note_revision(sender, instance, using, raw=False, **kwargs):
+    """Сохраняет ревизию в той же транзакции, что и заметку."""
+    if not raw:
+        record_revision(instance, using)
+
+
+@receiver(post_save, sender=Note)
+def record_note_change(sender, instance, using, **kwargs):
+    """Добавляет запись в журнал синхронизации."""
+    NoteChange.objects.using(using).create(
+        author_id=instance.author_id,
+        note_id=instance.pk,
+        slug=instance.slug,
+    )
+
+
+@receiver(post_delete, sender=Note)
+def record_note_tombstone(sender, instance, using, **kwargs):
+    """Удаление, в том числе каскадное, записывается надгробием."""
+    NoteChange.objects.using(using).create(
+        author_id=instance.author_id,
+        note_id=instance.pk,
+        slug=instance.slug,
+        deleted=True,
+    )
+
+
+@receiver(notes_bulk_created, sender=Note)
+def record_notes_batch(sender, notes, using, **kwargs):
+    NoteChange.objects.using(using).bulk_create(
+        NoteChange(
+            author_id=note.author_id, note_id=note.pk, slug=note.slug
+        )
+        for note in notes
+    )
+
+
+@receiver(notes_bulk_deleted, sender=Note)
+def record_tombstones_batch(sender, notes, using, **kwargs):
+    NoteChange.objects.using(using).bulk_create(
+        NoteChange(
+            author_id=note.author_id,
+            note_id=note.pk,
+            slug=note.slug,
+            deleted=True,
+        )
+        for note in notes
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def mirror_new_user(sender, instance, created, using, **kwargs):
+    """Новый пользователь нужен во всех шардах для внешних ключей."""
+    if created and using == DEFAULT_DB_ALIAS:
+        mirror_users([instance])
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def delete_mirrored_user(sender, instance, using, **kwargs):
+    """Удаляет копии пользователя вместе с его заметками в шардах."""
+    if using != DEFAULT_DB_ALIAS:
+        return
+    for alias in note_databases():
+        if alias != using:
+            sender.objects.using(alias).filter(pk=instance.pk).delete()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    """Правка, смена пароля или удаление сбрасывают кеш пользователя."""
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
@@ -0,0 +1,130 @@
+"""Подбор свободных slug для заметок.
+
+Используется и моделью, и импортом: транслитерация кешируется,
+а свободный суффикс "-N" ищется одним запросом по индексу slug.
+"""
+from functools import lru_cache
+
+from django.db.models import Q
+from pytils.translit import slugify
+
+SLUG_MAX_LENGTH = 100
+DEFAULT_SLUG = 'note'
+# Место под суффикс вида "-1234567" у длинных slug.
+SUFFIX_RESERVE = 8
+# Сколько диапазонов объединять в одном запросе.
+RANGES_PER_QUERY = 100
+
+WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+
+
+@lru_cache(maxsize=4096)
+def base_slug(title):
+    """Slug, который заметка получила бы без учёта занятых значений."""
+    return slugify(title)[:SLUG_MAX_LENGTH] or DEFAULT_SLUG
+
+
+def _stem(slug):
+    return slug[:SLUG_MAX_LENGTH - SUFFIX_RESERVE]
+
+
+def _suffix_range(stem):
+    # Все slug вида "<stem>-N" лежат строго между "<stem>-" и "<stem>.":
+    # точка идёт в таблице символов сразу за дефисом. Такое условие,
+    # в отличие от LIKE, обслуживается обычным индексом по slug.
+    return Q(slug__gt=f'{stem}-', slug__lt=f'{stem}.')
+
+
+def _max_suffixes(queryset, stems):
+    """Наибольший занятый числовой суффикс для каждой основы."""
+    stems = list(stems)
+    result = dict.fromkeys(stems, 1)
+    for start in range(0, len(stems), RANGES_PER_QUERY):
+        chunk = stems[start:start + RANGES_PER_QUERY]
+        # Условие собирается сразу целиком: последовательное "|="
+        # сравнивает каждое новое слагаемое со всеми прежними.
+        condition = Q(
+            *(_suffix_range(stem) for stem in chunk), _connector=Q.OR
+        )
+        for slug in queryset.filter(condition).values_list('slug', flat=True):
+            stem, _, number = slug.rpartition('-')
+            if stem in result and number.isdecimal():
+                result[stem] = max(result[stem], int(number))
+    return result
+
+
+def allocate_slug(queryset, slug):
+    """Возвращает slug или ближайший свободный вариант с суффиксом.
+
+    Сам slug и все его варианты "-N" выбираются одним запросом.
+    """
+    stem = _stem(slug)
+    taken = set(
+        queryset.filter(Q(slug=slug) | _suffix_range(stem))
+        .values_list('slug', flat=True)
+    )
+    if slug not in taken:
+        return slug
+    numbers = [
+        int(number)
+        for taken_stem, _, number in (
+            taken_slug.rpartition('-') for taken_slug in taken
+        )
+        if taken_stem == stem and number.isdecimal()
+    ]
+    return f'{stem}-{max(numbers, default=1) + 1}'
+
+
+def slug_taken(queryset, note):
+    """Занят ли slug заметки другой записью из queryset.
+
+    Нужна после IntegrityError: нарушено могло быть и другое
+    ограничение, а не уникальность slug.
+    """
+    return queryset.filter(slug=note.slug).exclude(pk=note.pk).exists()
+
+
+def allocate_slugs(queryset, slugs, issued=None):
+    """Возвращает свободные slug для списка желаемых значений.
+
+    Занятые значения определяются одним запросом по списку, а для
+    каждого совпадения подбирается суффикс "-N" по диапазону индекса.
+    Дубликаты внутри самого списка тоже получают суффиксы.
+
+    issued - словарь "основа -> последний выданный суффикс", общий
+    для нескольких вызовов. Основы из него считаются занятыми без
+    обращения к базе, поэтому slug можно раздавать пачкам, которые
+    ещё не записаны.
+    """
+    slugs = list(slugs)
+    known = {} if issued is None else issued
+    wanted = list(dict.fromkeys(slugs))
+    # Основы из общего словаря заняты без проверки по базе.
+    fresh = [slug for slug in wanted if _stem(slug) not in known]
+    taken = {slug for slug in wanted if _stem(slug) in known}
+    for start in range(0, len(fresh), 500):
+        taken.update(queryset.filter(
+            slug__in=fresh[start:start + 500]
+        ).values_list('slug', flat=True))
+    assigned = set()
+    clashes = set()
+    for slug in slugs:
+        if (slug in taken or slug in assigned) and _stem(slug) not in known:
+            clashes.add(_stem(slug))
+        assigned.add(slug)
+    suffixes = known
+    suffixes.update(_max_suffixes(queryset, clashes))
+    assigned = set()
+    result = []
+    for slug in slugs:
+        stem = _stem(slug)
+        if slug in taken or slug in assigned:
+            while slug in taken or slug in assigned:
+                suffixes[stem] += 1
+                slug = f'{stem}-{suffixes[stem]}'
+        elif issued is not None:
+            # Основа выдана впервые: следующей достанется "-2".
+            suffixes[stem] = 1
+        assigned.add(slug)
+        result.append(slug)
+    return result
@@ -0,0 +1,39 @@
+"""Фоновые задачи приложения notes, см. notes.jobs."""
+from .jobs import task
+from .models import Note
+from .rendering import prerender
+from .search import get_backend
+
+
+@task('notes.reindex_note')
+def reindex_note(note_id, using):
+    """Приводит поисковый индекс заметки к её текущему состоянию.
+
+    Заодно кладёт HTML текста в общий кеш: сохранение заметки ставит
+    одну задачу, а не отдельную на индекс и на отрисовку.
+    """
+    note = Note.objects.using(using).filter(pk=note_id).first()
+    if note is None:
+        get_backend(using).remove([note_id])
+    else:
+        get_backend(using).index([note])
+        prerender(note.text)
+
+
+@task('notes.reindex_notes')
+def reindex_notes(note_ids, using):
+    """reindex_note для пачки заметок одной задачей."""
+    notes = list(Note.objects.using(using).filter(pk__in=note_ids))
+    found = {note.pk for note in notes}
+    backend = get_backend(using)
+    backend.remove([pk for pk in note_ids if pk not in found])
+    if notes:
+        backend.index(notes)
+
+
+@task('notes.render_note')
+def render_note(note_id, using):
+    """Отрисовка для задач, поставленных до объединения с индексом."""
+    note = Note.objects.using(using).filter(pk=note_id).only('text').first()
+    if note is not None:
+        prerender(note.text)
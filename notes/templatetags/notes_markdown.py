@@ -0,0 +1,11 @@
+from django import template
+
+from notes.rendering import render_markdown
+
+register = template.Library()
+
+
+@register.filter
+def markdown(text):
+    """Текст заметки в HTML; Markdown разбирается только после правки."""
+    return render_markdown(text)
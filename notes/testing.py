@@ -0,0 +1,44 @@
+"""Окружение для тестов и замеров.
+
+Файловый кеш проекта общий для всех процессов, в том числе для
+запущенного сервера разработки. Тесты и замеры получают пустой кеш
+во временном каталоге: иначе они видели бы чужие сессии и страницы,
+а результаты зависели бы от накопленных записей.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+@contextmanager
+def isolated_caches():
+    """Подменяет каталоги файловых кешей временными на время блока."""
+    with tempfile.TemporaryDirectory(prefix='yanote-cache-') as location:
+        caches = {
+            alias: (
+                {**config, 'LOCATION': os.path.join(location, alias)}
+                if config['BACKEND'] == FILE_CACHE else config
+            )
+            for alias, config in settings.CACHES.items()
+        }
+        with override_settings(CACHES=caches):
+            yield
+
+
+class IsolatedCacheRunner(DiscoverRunner):
+    """manage.py test с временным кешем, см. isolated_caches()."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = isolated_caches()
+        self._caches.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from notes import views
+from notes import api, views
 
 app_name = 'notes'
 
@@ -11,5 +11,16 @@ urlpatterns = [
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/bulk/', views.NotesBulk.as_view(), name='bulk'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path('history/<slug:slug>/', views.NoteHistory.as_view(), name='history'),
+    path(
+        'history/<slug:slug>/restore/<int:number>/',
+        views.NoteRestore.as_view(),
+        name='restore',
+    ),
+    path('api/sync/', api.NoteSync.as_view(), name='sync'),
+    path('api/notes/', api.notes_api, name='api-list'),
+    path('api/notes/<slug:slug>/', api.note_api, name='api-detail'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
@@ -1,9 +1,30 @@
+from http import HTTPStatus
+
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, router, transaction
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse,
+)
+from django.shortcuts import redirect
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import condition
+
+from . import cache, rendering
+from .bulk import bulk_delete_notes, soft_delete_notes
+from .conditional import note_etag, note_last_modified, notes_list_etag
+from .exchange import FORMATS, iter_records
+from .fields import decode_text
+from .forms import WARNING, NoteForm
+from .models import Note, NoteRevision
+from .pagination import KeysetPaginator
+from .revisions import revision_text
+from .search import get_backend
+from .slugs import slug_taken
 
-from .forms import NoteForm
-from .models import Note
+EXPORT_CONTENT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
 
 
 class Home(generic.TemplateView):
@@ -23,37 +44,240 @@ class NoteBase(LoginRequiredMixin):
 
     def get_queryset(self):
         """Пользователь может работать только со своими заметками."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.for_author(self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class CachedPageMixin:
+    """Отдаёт страницу из кеша автора, пока его заметки не менялись.
+
+    NoteCreate, NoteUpdate и NoteDelete сохраняют или удаляют заметку,
+    а обработчики сигналов в notes.signals увеличивают версию кеша
+    автора - после этого прежние страницы больше не отдаются.
+    """
+
+    def get(self, request, *args, **kwargs):
+        key = cache.page_key(
+            request.user.pk, request.get_full_path(),
+            rendering.RENDER_VERSION,
+        )
+        page = cache.get_page(key)
+        if page is not None:
+            content, content_type = page
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = super().get(request, *args, **kwargs)
+        response['X-Cache'] = 'MISS'
+
+        def store(rendered):
+            if rendered.status_code == HTTPStatus.OK:
+                cache.set_page(
+                    key, rendered.content, rendered['Content-Type']
+                )
+
+        response.add_post_render_callback(store)
+        return response
+
+
+class NoteFormMixin(NoteBase):
+    """Общая часть создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """Сохраняет заметку; занятый параллельно slug - ошибка формы."""
+        using = router.db_for_write(Note, instance=form.instance)
+        try:
+            with transaction.atomic(using=using):
+                return super().form_valid(form)
+        except IntegrityError:
+            if not slug_taken(Note.objects.using(using), form.instance):
+                raise
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
-    """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
+@method_decorator(
+    condition(etag_func=note_etag, last_modified_func=note_last_modified),
+    name='post',
+)
+class NoteUpdate(NoteFormMixin, generic.UpdateView):
+    """Редактирование заметки.
+
+    Клиент может передать ETag страницы заметки в If-Match: если
+    заметку успели изменить, сохранение отклоняется с кодом 412.
+    """
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
-    """Удаление заметки."""
+    """Удаление заметки.
+
+    Заметка только помечается удалённой: это одна обновлённая строка
+    вместо каскадного удаления. Строку позже удалит purge_notes.
+    """
     template_name = 'notes/delete.html'
 
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        using = router.db_for_write(Note, instance=self.object)
+        with transaction.atomic(using=using):
+            soft_delete_notes([self.object], using)
+        return redirect(self.get_success_url())
+
 
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+@method_decorator(condition(etag_func=notes_list_etag), name='get')
+@method_decorator(ensure_csrf_cookie, name='get')
+class NotesList(NoteBase, CachedPageMixin, generic.ListView):
+    """Список всех заметок пользователя.
+
+    Страница общая для всех браузеров автора и поэтому не содержит
+    CSRF-токена: форма массовых действий берёт его из cookie.
+    """
     template_name = 'notes/list.html'
+    paginate_by = 50
 
+    def get_queryset(self):
+        """Списку нужны только id, slug и заголовок - текст не читаем."""
+        return super().get_queryset().only('id', 'slug', 'title')
 
-class NoteDetail(NoteBase, generic.DetailView):
+    def paginate_queryset(self, queryset, page_size):
+        """Постраничный вывод по курсору вместо номера страницы.
+
+        Выборка уже отфильтрована по автору, поэтому поиск идёт
+        по составному индексу (author_id, id).
+        """
+        paginator = KeysetPaginator(queryset, page_size)
+        page = paginator.page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class NotesBulk(NoteBase, generic.View):
+    """Удаление или выгрузка выбранных в списке заметок.
+
+    Каждое действие - один запрос по заметкам автора с id из формы,
+    а не цикл по объектам.
+    """
+
+    def post(self, request):
+        # Выбрать можно только заметки одной страницы списка.
+        ids = [
+            pk for pk in request.POST.getlist('ids') if pk.isdigit()
+        ][:NotesList.paginate_by]
+        action = request.POST.get('action')
+        if action == 'delete':
+            bulk_delete_notes(request.user, ids)
+            return redirect('notes:list')
+        if action == 'export':
+            fmt = request.POST.get('format', FORMATS[0])
+            if fmt in FORMATS:
+                return self.export(ids, fmt)
+        return HttpResponseBadRequest('Неизвестное действие.')
+
+    def export(self, ids, fmt):
+        """Выгрузка отдаётся потоком, как в команде notes_export."""
+        response = StreamingHttpResponse(
+            iter_records(self.records(ids), fmt),
+            content_type=EXPORT_CONTENT_TYPES[fmt] + '; charset=utf-8',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{fmt}"'
+        )
+        return response
+
+    def records(self, ids):
+        rows = self.get_queryset().filter(pk__in=ids).order_by('pk')
+        author = self.request.user.username
+        for title, text, slug in (
+            rows.values_list('title', 'text', 'slug').iterator()
+        ):
+            yield {
+                'title': title,
+                'text': decode_text(text),
+                'slug': slug,
+                'author': author,
+            }
+
+
+@method_decorator(
+    condition(etag_func=note_etag, last_modified_func=note_last_modified),
+    name='get',
+)
+class NoteDetail(NoteBase, CachedPageMixin, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+    context_object_name = 'results'
+
+    def get_queryset(self):
+        """Заметки в порядке релевантности с подсвеченными совпадениями."""
+        query = self.request.GET.get('q', '').strip()
+        if not query:
+            return []
+        queryset = super().get_queryset()
+        results = get_backend(queryset.db).search(self.request.user.pk, query)
+        notes = queryset.only('id', 'slug', 'title').in_bulk(
+            [result.note_id for result in results]
+        )
+        found = []
+        for result in results:
+            note = notes.get(result.note_id)
+            if note is not None:
+                note.highlighted_title = result.title
+                note.snippet = result.snippet
+                found.append(note)
+        return found
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NoteHistory(NoteBase, generic.DetailView):
+    """История правок заметки; ?revision= показывает текст ревизии."""
+    template_name = 'notes/history.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        revisions = self.object.revisions.defer('data').order_by('-number')
+        context['revisions'] = revisions
+        number = self.request.GET.get('revision')
+        if number:
+            try:
+                selected = revisions.get(number=number)
+            except (ValueError, NoteRevision.DoesNotExist):
+                raise Http404('Нет такой ревизии.')
+            selected.text = revision_text(selected)
+            context['selected'] = selected
+        return context
+
+
+class NoteRestore(NoteBase, generic.detail.SingleObjectMixin, generic.View):
+    """Возвращает заметку к ревизии; это тоже новая ревизия."""
+
+    def post(self, request, slug, number):
+        note = self.get_object()
+        revision = note.revisions.filter(number=number).first()
+        if revision is None:
+            raise Http404('Нет такой ревизии.')
+        note.title = revision.title
+        note.text = revision_text(revision)
+        using = router.db_for_write(Note, instance=note)
+        with transaction.atomic(using=using):
+            note.save()
+        return redirect('notes:detail', slug=note.slug)
@@ -13,4 +13,22 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Импорт после настройки Django: модулю нужны приложения и модели.
+from notes.checks import ensure_shared_cache  # noqa: E402
+from notes.events import STREAM_PATH, EventStream  # noqa: E402
+
+ensure_shared_cache()
+
+events_application = EventStream()
+
+
+async def application(scope, receive, send):
+    """Поток событий обслуживается в обход Django: долгие соединения
+    не проходят цепочку middleware и не держат ресурсы обработчика.
+    """
+    if scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+        await events_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
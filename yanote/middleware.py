@@ -0,0 +1,38 @@
+"""WhiteNoise, который не переводит ASGI-цепочку в синхронный режим."""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoise
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoise):
+    """Под ASGI поиск файла - обращение к словарю в памяти, а открытие
+    найденного файла уходит в поток. Остальные запросы передаются
+    дальше без переключения в синхронный поток Django.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(
+                self.find_file, thread_sensitive=False
+            )(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(
+                self.serve, thread_sensitive=False
+            )(static_file, request)
+        return await self.get_response(request)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,7 +23,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.middleware.RequestMetricsMiddleware',
+    'notes.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yanote.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -37,8 +41,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Скомпилированные шаблоны кешируются в памяти процесса;
+            # после правки шаблона процесс нужно перезапустить.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -59,6 +70,148 @@ DATABASES = {
     }
 }
 
+# Профиль базы для боевого запуска: YANOTE_DB_PROFILE=production.
+# WAL не блокирует чтение во время записи, транзакции сразу берут
+# блокировку записи (BEGIN IMMEDIATE), а соединения переживают запрос.
+DATABASE_PROFILES = {
+    'production': {
+        'ENGINE': 'yanote.sqlite_backend',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'busy_timeout': 5000,
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64 * 1024,
+            },
+        },
+    },
+}
+DATABASE_PROFILE = os.environ.get('YANOTE_DB_PROFILE')
+if DATABASE_PROFILE:
+    DATABASES['default'].update(DATABASE_PROFILES[DATABASE_PROFILE])
+
+# Шарды и реплики заметок (см. notes/routers.py). Для проверки на
+# SQLite: YANOTE_DB_SHARDS=N добавляет базы shard-0..shard-N-1
+# в отдельных файлах, YANOTE_DB_REPLICAS=M - по M реплик каждой
+# основной базы, которые читают тот же файл.
+DATABASE_ROUTERS = ['notes.routers.NotesRouter']
+NOTES_DATABASE_SHARDS = []
+NOTES_DATABASE_REPLICAS = {}
+for index in range(int(os.environ.get('YANOTE_DB_SHARDS', 0))):
+    alias = f'shard-{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'], 'NAME': BASE_DIR / f'db-{alias}.sqlite3',
+    }
+    NOTES_DATABASE_SHARDS.append(alias)
+for primary in NOTES_DATABASE_SHARDS or ['default']:
+    for index in range(int(os.environ.get('YANOTE_DB_REPLICAS', 0))):
+        alias = f'{primary}-replica-{index}'
+        DATABASES[alias] = {**DATABASES[primary], 'TEST': {'MIRROR': primary}}
+        NOTES_DATABASE_REPLICAS.setdefault(primary, []).append(alias)
+
+# Кеш NOTES_CACHE_ALIAS хранит сессии, пользователей, страницы и HTML
+# заметок, поэтому он должен быть общим для всех процессов: выход или
+# правка в одном процессе должны быть видны остальным. По умолчанию -
+# файловый кеш, общий для процессов одной машины, в каталоге проекта
+# или YANOTE_CACHE_DIR; YANOTE_MEMCACHED=host:port (нужен pymemcache) -
+# для нескольких машин. Каталог не должен быть доступен на запись
+# другим пользователям: кеш хранит сессии и пользователей в pickle.
+# Кеш в памяти процесса отклоняет проверка notes.E001 (см.
+# notes/checks.py). Тесты работают с собственным временным кешем
+# (notes/testing.py).
+if os.environ.get('YANOTE_MEMCACHED'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ['YANOTE_MEMCACHED'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get(
+                'YANOTE_CACHE_DIR', str(BASE_DIR / 'cache')
+            ),
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,
+            },
+        }
+    }
+
+NOTES_CACHE_ALIAS = 'default'
+
+TEST_RUNNER = 'notes.testing.IsolatedCacheRunner'
+NOTES_CACHE_TIMEOUT = 60 * 10
+
+# Сессии читаются из кеша и сохраняются ещё и в базу, а пользователь
+# берётся из кеша (см. notes/auth.py): страница залогиненного
+# пользователя не делает запросов к django_session и auth_user.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = NOTES_CACHE_ALIAS
+AUTHENTICATION_BACKENDS = ['notes.auth.CachedModelBackend']
+NOTES_USER_CACHE_TIMEOUT = 60
+
+# Тексты заметок длиннее порога хранятся сжатыми; None отключает сжатие.
+NOTES_TEXT_COMPRESS_MIN_SIZE = 1024
+NOTES_TEXT_COMPRESS_LEVEL = 6
+
+# Отрисовка Markdown (notes/rendering.py): число записей LRU в памяти
+# процесса и время жизни HTML в общем кеше NOTES_CACHE_ALIAS. Ключ
+# зависит от текста, поэтому устареть запись не может.
+NOTES_MARKDOWN_LRU_SIZE = 256
+NOTES_MARKDOWN_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Сжатие ответов (CompressionMiddleware). Уровни выбраны по
+# notes_benchmark_compression: дальше размер почти не уменьшается,
+# а время сжатия растёт в разы.
+NOTES_COMPRESS_MIN_SIZE = 512
+NOTES_COMPRESS_BROTLI_LEVEL = 4
+NOTES_COMPRESS_GZIP_LEVEL = 6
+
+# Потоки, в которых асинхронный JSON API (notes/api.py) работает
+# с ORM; столько же одновременных соединений с базой он и откроет.
+NOTES_API_ORM_THREADS = 8
+
+# События заметок для открытых страниц (notes/events.py): бэкенд
+# доставки, размер очереди одного соединения и период пинга в секундах.
+NOTES_EVENTS_BACKEND = 'notes.events.LocalBackend'
+NOTES_EVENTS_QUEUE_SIZE = 100
+NOTES_EVENTS_HEARTBEAT = 15
+
+# Фоновые задачи (notes/jobs.py, manage.py run_workers): аренда задачи
+# в секундах, число попыток и задержка первого повтора; при EAGER
+# задачи выполняются сразу при постановке.
+NOTES_JOBS_EAGER = False
+NOTES_JOBS_LEASE = 300
+NOTES_JOBS_MAX_ATTEMPTS = 5
+NOTES_JOBS_RETRY_DELAY = 10
+
+# История правок (notes/revisions.py): сколько ревизий подряд может
+# быть дельтами после снимка и старше скольких дней ревизии
+# прореживает compact_revisions.
+NOTES_REVISION_CHAIN_LENGTH = 20
+NOTES_REVISION_KEEP_DAYS = 30
+
+# Удалённые заметки остаются в таблице (deleted_at) и окончательно
+# удаляются manage.py purge_notes: через сколько дней, по сколько
+# заметок за транзакцию и с какой паузой в секундах между пачками.
+NOTES_PURGE_AFTER_DAYS = 30
+NOTES_PURGE_BATCH_SIZE = 500
+NOTES_PURGE_PAUSE = 0.5
+
+# Админка заметок (notes/admin.py): до скольких записей считать точно;
+# дальше changelist показывает оценку по статистике таблицы.
+NOTES_ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# Метрики запросов пишутся в логгер notes.metrics. Число повторов
+# одного SQL-запроса, после которого он считается проблемой N+1;
+# None отключает проверку.
+NOTES_METRICS_N_PLUS_ONE_THRESHOLD = None
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -82,6 +235,13 @@ USE_TZ = True
 
 
 STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATICFILES_DIRS = [BASE_DIR / 'static']
+# Статику отдаёт само приложение через WhiteNoise: файлы с хешем
+# в имени кешируются браузером навсегда, сжатые копии выбираются
+# по Accept-Encoding. Без collectstatic файлы берутся из STATICFILES_DIRS.
+STATICFILES_STORAGE = 'yanote.storage.StaticFilesStorage'
+WHITENOISE_USE_FINDERS = True
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
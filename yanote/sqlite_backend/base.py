@@ -0,0 +1,42 @@
+"""SQLite с настройками для конкурентной записи.
+
+Помимо обычных параметров sqlite3.connect в OPTIONS принимаются:
+
+- pragmas - словарь PRAGMA, выполняемых при открытии соединения;
+- transaction_mode - режим BEGIN для транзакций (DEFERRED,
+  IMMEDIATE или EXCLUSIVE).
+
+BEGIN IMMEDIATE берёт блокировку записи в начале транзакции. При
+обычном BEGIN транзакция, которая сначала читает, а потом пишет,
+получает "database is locked" сразу, без ожидания busy_timeout,
+если другой процесс успел записать раньше неё.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        self.transaction_mode = params.pop('transaction_mode', None)
+        if self.transaction_mode not in (None, *TRANSACTION_MODES):
+            raise ImproperlyConfigured(
+                f'Неизвестный transaction_mode: {self.transaction_mode}.'
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,16 @@
+"""Хранилище статики с хешами в именах и сжатыми копиями файлов."""
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """collectstatic добавляет к именам хеш содержимого и кладёт рядом
+    .gz и .br; WhiteNoise отдаёт такие файлы с кешированием навсегда.
+
+    Пока манифест не собран (тесты, запуск без collectstatic), шаблоны
+    получают исходные имена файлов, а не ошибку.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
 
 application = get_wsgi_application()
+
+# Импорт после настройки Django.
+from notes.checks import ensure_shared_cache  # noqa: E402
+
+ensure_shared_cache()